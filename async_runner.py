@@ -0,0 +1,235 @@
+"""
+Non-blocking, cancellable model calls for Streamlit sessions.
+
+Model requests run as asyncio tasks on one background event loop shared by the
+whole process. The Streamlit script thread only waits on the chunks a request
+has produced so far, so a request can be cancelled, joined by a duplicate
+submission, or abandoned after a wall-clock timeout.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Iterator, List, Optional, TypeVar
+
+from scheduler import RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """An asyncio event loop running forever in a daemon thread."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="science-bot-loop", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro: Awaitable) -> Future:
+        """Schedule a coroutine on the loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+class _Request:
+    """One model request and the chunks it has produced so far."""
+
+    def __init__(self, prompt: str):
+        self.prompt = prompt
+        self.chunks: List[str] = []
+        self.done = False
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+        # Set once a caller has read the whole response
+        self.delivered = False
+        self.future: Optional[Future] = None
+        self.cond = threading.Condition()
+        self.created_at = time.monotonic()
+        # When the scheduler let the request through; None while it is queued
+        self.admitted_at: Optional[float] = None
+
+    def admit(self):
+        self.admitted_at = time.monotonic()
+
+    def append(self, chunk: str):
+        with self.cond:
+            self.chunks.append(chunk)
+            self.cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None, cancelled: bool = False):
+        with self.cond:
+            if self.done:
+                return
+            self.done = True
+            self.error = error
+            self.cancelled = cancelled
+            self.cond.notify_all()
+
+
+class SessionRunner:
+    """Runs one session's model calls on a BackgroundLoop.
+
+    Submitting a new prompt cancels the request in flight. Submitting the prompt
+    that is already running (or finished but not yet shown) joins that request
+    instead of paying for a second completion.
+    """
+
+    def __init__(
+        self,
+        background: BackgroundLoop,
+        timeout_seconds: float = 45.0,
+        scheduler: Optional[RequestScheduler] = None,
+        session_id: str = "default",
+        max_queue_seconds: float = 120.0,
+        poll_seconds: float = 0.5,
+    ):
+        self.background = background
+        # Wall-clock limit on a request once it has been admitted
+        self.timeout_seconds = timeout_seconds
+        self.scheduler = scheduler
+        self.session_id = session_id
+        # Limit on time spent waiting for admission
+        self.max_queue_seconds = max_queue_seconds
+        # How often on_wait callbacks fire while waiting for the first chunk
+        self.poll_seconds = poll_seconds
+        self.cancelled = 0
+        self.coalesced = 0
+        self.timed_out = 0
+        self._lock = threading.Lock()
+        self._current: Optional[_Request] = None
+        # Serializes agent runs on the loop; created lazily on the loop thread
+        self._agent_lock: Optional[asyncio.Lock] = None
+
+    def stream(
+        self, bot, prompt: str, use_cache: bool = False, on_wait: Optional[Callable[[], None]] = None
+    ) -> Iterator[str]:
+        """Yield the bot's reply to prompt, falling back to a friendly message on timeout or error.
+
+        on_wait is called periodically from this thread until the first chunk arrives.
+        """
+        with self._lock:
+            request = self._current
+            if request is not None and request.prompt == prompt and self._joinable(request):
+                self.coalesced += 1
+            else:
+                self._cancel_current()
+                request = _Request(prompt)
+                request.future = self.background.submit(self._produce(bot, request, use_cache))
+                # A task cancelled before it starts never runs _produce's handlers
+                request.future.add_done_callback(
+                    lambda future, request=request: future.cancelled() and request.finish(cancelled=True)
+                )
+                self._current = request
+        yield from self._consume(request, bot.fallback_message, on_wait)
+
+    def pending_prompt(self) -> Optional[str]:
+        """Return the prompt of a request that has not been fully shown yet, if any."""
+        with self._lock:
+            request = self._current
+            if request is None or not self._joinable(request):
+                return None
+            return request.prompt
+
+    def queue_position(self) -> Optional[int]:
+        """Number of sessions ahead of this one in the scheduler, or None if not queued."""
+        if self.scheduler is None:
+            return None
+        return self.scheduler.position(self.session_id)
+
+    def cancel(self):
+        """Cancel the request in flight, if any."""
+        with self._lock:
+            self._cancel_current()
+
+    def run_exclusive(self, fn: Callable[[], T], timeout: float = 10.0) -> T:
+        """Call fn on the loop while none of this session's requests is using the agent."""
+
+        async def call():
+            if self._agent_lock is None:
+                self._agent_lock = asyncio.Lock()
+            async with self._agent_lock:
+                return fn()
+
+        return self.background.submit(call()).result(timeout)
+
+    @staticmethod
+    def _joinable(request: _Request) -> bool:
+        """Whether a request can still be joined instead of starting a new one."""
+        return not request.delivered and not request.cancelled and request.error is None
+
+    def _cancel_current(self):
+        """Cancel the current request. Caller must hold the lock."""
+        request = self._current
+        if request is not None and not request.done and request.future is not None:
+            request.future.cancel()
+            self.cancelled += 1
+        self._current = None
+
+    async def _produce(self, bot, request: _Request, use_cache: bool):
+        if self._agent_lock is None:
+            self._agent_lock = asyncio.Lock()
+        try:
+            # Wait for a cancelled predecessor to unwind before touching the agent
+            async with self._agent_lock:
+                def make_stream():
+                    return bot.arun_stream(request.prompt, use_cache=use_cache)
+
+                if self.scheduler is None or bot.has_cached_response(request.prompt, use_cache):
+                    request.admit()
+                    chunks = make_stream()
+                else:
+                    chunks = self.scheduler.stream(self.session_id, make_stream, on_admit=request.admit)
+                async for chunk in chunks:
+                    request.append(chunk)
+        except asyncio.CancelledError:
+            request.finish(cancelled=True)
+            raise
+        except Exception as e:
+            logger.warning("Model request failed: %s", e)
+            request.finish(error=e)
+            return
+        request.finish()
+
+    def _consume(
+        self, request: _Request, fallback_message: str, on_wait: Optional[Callable[[], None]]
+    ) -> Iterator[str]:
+        index = 0
+        while True:
+            with request.cond:
+                if index >= len(request.chunks) and not request.done:
+                    remaining = self._deadline(request) - time.monotonic()
+                    if remaining > 0:
+                        request.cond.wait(min(remaining, self.poll_seconds))
+                new_chunks = request.chunks[index:]
+                done = request.done
+            index += len(new_chunks)
+            yield from new_chunks
+
+            if done:
+                if request.cancelled:
+                    return
+                if request.error is not None:
+                    yield f"\n\n{fallback_message}" if index else fallback_message
+                    return
+                request.delivered = True
+                return
+            if new_chunks:
+                continue
+            if time.monotonic() >= self._deadline(request):
+                self.timed_out += 1
+                with self._lock:
+                    if self._current is request:
+                        self._cancel_current()
+                yield f"\n\n{fallback_message}" if index else fallback_message
+                return
+            if index == 0 and on_wait is not None:
+                on_wait()
+
+    def _deadline(self, request: _Request) -> float:
+        """Queue time and model time are limited separately."""
+        if request.admitted_at is None:
+            return request.created_at + self.max_queue_seconds
+        return request.admitted_at + self.timeout_seconds
@@ -1,472 +1,898 @@
-"""
-Science Explorer Bot - A Streamlit app for elementary school science fair projects
-Provides guided support for scientific exploration and project development.
-
-Run `pip install streamlit agno` to install dependencies.
-"""
-
-import streamlit as st
-import os
-import datetime
-from typing import List, Optional
-
-from agno.agent import Agent
-from agno.models.groq import Groq
-
-# Set page configuration
-st.set_page_config(
-    page_title="Science Explorer Bot 🔬",
-    page_icon="🔬",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS for kid-friendly aesthetics
-st.markdown("""
-<style>
-    .main {
-        background-color: #f8f9fa;
-    }
-    .stApp {
-        background-image: linear-gradient(to bottom right, #c9f5ff, #e8f8ff);
-    }
-    .css-18e3th9 {
-        padding-top: 2rem;
-    }
-    .sidebar-content {
-        padding: 1rem;
-        background-color: rgba(255, 255, 255, 0.8);
-        border-radius: 1rem;
-        border: 3px solid #4dabf7;
-    }
-    h1, h2, h3 {
-        color: #1e88e5;
-        font-family: 'Comic Sans MS', cursive, sans-serif;
-    }
-    .stButton button {
-        background-color: #4dabf7;
-        color: white;
-        font-weight: bold;
-        border: none;
-        padding: 0.5rem 1rem;
-        border-radius: 0.8rem;
-        transition: all 0.3s ease;
-        font-family: 'Comic Sans MS', cursive, sans-serif;
-    }
-    .stButton button:hover {
-        background-color: #3a8bd8;
-        transform: translateY(-2px);
-    }
-    .kid-mode {
-        background-color: #ffeb3b;
-        padding: 10px;
-        border-radius: 10px;
-        border: 3px dashed #ff9800;
-        margin-bottom: 15px;
-    }
-    .parent-mode {
-        background-color: #bbdefb;
-        padding: 10px;
-        border-radius: 10px;
-        border: 3px dashed #1976d2;
-        margin-bottom: 15px;
-    }
-    footer {
-        font-size: 0.8rem;
-        text-align: center;
-        color: #666;
-        margin-top: 2rem;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-class ScienceExplorerBot:
-    def __init__(self, is_kid_mode=True):
-        # Set mode (kid or parent)
-        self.is_kid_mode = is_kid_mode
-        
-        # Initialize agent with Groq model and built-in memory
-        self.agent = Agent(
-            model=Groq(
-                id="llama-3.1-8b-instant"
-               
-            ),
-            description="An educational science guide for elementary school science fair projects.",
-            instructions=self._get_instructions(),
-            add_history_to_messages=True,
-            markdown=True,  # Enable markdown formatting
-        )
-    
-    def _get_instructions(self) -> List[str]:
-        """Define the behavior and guardrails for the Science Explorer bot."""
-        if self.is_kid_mode:
-            return [
-                "You are Professor Atom, a friendly and encouraging science explorer who helps elementary school kids (ages 6-10) with science fair projects for Hackett Elementary.",
-                
-                "COMMUNICATION STYLE:",
-                "- Use simple, clear language appropriate for 3rd graders (8-9 year olds)",
-                "- Be enthusiastic, encouraging, and playful with lots of fun emoji (🔬 🧪 🌈 🦄 🚀 🧠 💥)",
-                "- Use short paragraphs and sentences",
-                "- Ask lots of questions to guide children's thinking rather than giving answers",
-                "- Express excitement about their ideas and discoveries",
-                "- Make science sound fun and magical while still being accurate",
-                "- Use examples that kids can relate to",
-                "- Keep responses relatively brief (150-250 words maximum)",
-                
-                "CONTENT APPROACH:",
-                "- NEVER give direct answers to science questions - instead ask guiding questions",
-                "- Guide students through the scientific method: question, hypothesis, experiment, observation, conclusion",
-                "- Suggest simple experiments with household materials",
-                "- Emphasize safety at all times and mention parental supervision for any experiments",
-                "- Focus on hands-on learning and observation skills",
-                "- Use the Socratic method - ask questions that lead to discovery",
-                "- Encourage critical thinking appropriate for elementary students",
-                "- Relate scientific concepts to everyday experiences",
-                "- Celebrate small discoveries and encourage persistence",
-                
-                "GUARDRAILS:",
-                "- Keep all suggestions safe for elementary students",
-                "- Avoid potentially dangerous experiments (chemicals, fire, electricity)",
-                "- No suggestions that could damage household items or create big messes",
-                "- Keep concepts at an elementary school level",
-                "- Be mindful of limited attention spans",
-                "- Always suggest parental supervision for any experiments",
-                
-                "Remember to be playful, use lots of emoji, and guide through questions rather than giving answers!"
-            ]
-        else:
-            # Parent mode instructions
-            return [
-                "You are Dr. Morgan, a knowledgeable science education specialist helping parents support their elementary school children with science fair projects for Hackett Elementary.",
-                
-                "COMMUNICATION STYLE:",
-                "- Use clear, direct language appropriate for parents",
-                "- Include occasional emoji to keep tone friendly (🔬 📝 📊)",
-                "- Be practical, organized, and strategic in your guidance",
-                "- Provide more detailed explanations than you would for children",
-                "- Balance enthusiasm with realistic expectations",
-                "- Include specific, actionable advice",
-                "- Keep responses moderate in length (250-400 words)",
-                
-                "CONTENT APPROACH:",
-                "- Provide age-appropriate science fair project ideas",
-                "- Explain how to guide children through the scientific method without doing the work for them",
-                "- Offer strategies to support learning while encouraging independence",
-                "- Suggest ways to manage time, materials, and expectations",
-                "- Provide tips on presentation, documentation, and display creation",
-                "- Include practical advice on how to handle common challenges",
-                "- Include examples of questions parents can ask to stimulate thinking",
-                "- Suggest how to talk about scientific concepts at an age-appropriate level",
-                "- Focus on creating learning experiences rather than perfect projects",
-                
-                "GUARDRAILS:",
-                "- Emphasize safety and supervision requirements",
-                "- Suggest alternatives to potentially dangerous materials",
-                "- Provide realistic time estimates for project completion",
-                "- Don't suggest overly complex projects inappropriate for elementary students",
-                "- Balance educational value with fun and engagement",
-                "- Remind parents that the process is more important than the final product",
-                "- Emphasize that parents should guide but not do the work",
-                
-                "Remember to provide practical support while encouraging the child's ownership of their project."
-            ]
-    
-    def run(self, prompt: str):
-        """Get a response from the agent using the run method."""
-        return self.agent.run(prompt)
-    
-    def switch_mode(self):
-        """Switch between kid and parent modes."""
-        self.is_kid_mode = not self.is_kid_mode
-        # Reinitialize the agent with new instructions
-        self.agent = Agent(
-            model=Groq(
-                id="llama-3.1-8b-instant",
-                api_key='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'
-            ),
-            description="An educational science guide for elementary school science fair projects.",
-            instructions=self._get_instructions(),
-            add_history_to_messages=True,
-            markdown=True,
-        )
-        return self.is_kid_mode
-
-def get_science_fair_suggestions(is_kid_mode):
-    """Return a list of suggested science fair topics for quick prompts."""
-    if is_kid_mode:
-        return [
-            "🌱 Plants and sunlight",
-            "🧲 Magnets are cool!",
-            "🌈 Rainbow colors",
-            "🦋 Bug habitats",
-            "💧 Water experiments",
-            "🚗 Ramps and cars",
-            "🍎 Food science",
-            "🧼 Soap and bubbles",
-            "🌪️ Weather fun",
-            "🔋 Simple machines",
-            "🦷 Tooth experiments",
-            "🧠 Five senses"
-        ]
-    else:
-        return [
-            "📋 Science fair timeline",
-            "📝 Project documentation",
-            "🏆 Judging criteria",
-            "🧪 Safe experiments",
-            "📊 Data visualization",
-            "📣 Presentation tips",
-            "🛒 Budget-friendly ideas",
-            "❓ Scientific method",
-            "📚 Research sources",
-            "🧮 Age-appropriate math",
-            "🖼️ Display board tips",
-            "📱 Technology integration"
-        ]
-
-def initialize_chat_history():
-    """Initialize session state variables for chat history."""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if "suggestion_clicked" not in st.session_state:
-        st.session_state.suggestion_clicked = None
-    if "is_kid_mode" not in st.session_state:
-        st.session_state.is_kid_mode = True
-
-def main():
-    # Initialize chat history and session state
-    initialize_chat_history()
-    
-    # Initialize bot if not already done
-    if 'bot' not in st.session_state:
-        st.session_state.bot = ScienceExplorerBot(is_kid_mode=st.session_state.is_kid_mode)
-    
-    # App title and description
-    if st.session_state.is_kid_mode:
-        st.title("🔬 Science Explorer Bot for Kids! 🚀")
-        st.markdown("""
-        > Hey there, science explorer! I'm Professor Atom and I'm here to help you create an AMAZING science fair project! Let's discover cool stuff together! 🌈✨
-        """)
-        mode_container = st.empty()
-        with mode_container.container():
-            st.markdown("""
-            <div class='kid-mode'>
-            <h3>👦👧 KID MODE ACTIVE! 👦👧</h3>
-            <p>I'll help you explore science and find a great project!</p>
-            </div>
-            """, unsafe_allow_html=True)
-    else:
-        st.title("🔬 Science Fair Parent Support")
-        st.markdown("""
-        > Welcome to the parent guide for Hackett Elementary School science fair projects. This resource will help you support your child's learning journey while letting them take ownership of their project.
-        """)
-        mode_container = st.empty()
-        with mode_container.container():
-            st.markdown("""
-            <div class='parent-mode'>
-            <h3>👨‍👩‍👧‍👦 PARENT MODE ACTIVE 👨‍👩‍👧‍👦</h3>
-            <p>Guidance for supporting your child's science fair journey.</p>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    # Sidebar with information and controls
-    with st.sidebar:
-        if st.session_state.is_kid_mode:
-            st.image("https://img.icons8.com/cute-clipart/64/000000/test-tube.png", width=100)
-        else:
-            st.image("https://img.icons8.com/color/64/000000/microscope.png", width=100)
-        
-        st.markdown("<div class='sidebar-content'>", unsafe_allow_html=True)
-        
-        # Mode switch
-        st.subheader("👨‍👩‍👧‍👦 Choose Your Mode 👦👧")
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Kid Mode" if not st.session_state.is_kid_mode else "✓ Kid Mode", 
-                        disabled=st.session_state.is_kid_mode):
-                st.session_state.is_kid_mode = True
-                st.session_state.bot.switch_mode()
-                st.rerun()
-        with col2:
-            if st.button("Parent Mode" if st.session_state.is_kid_mode else "✓ Parent Mode", 
-                        disabled=not st.session_state.is_kid_mode):
-                st.session_state.is_kid_mode = False
-                st.session_state.bot.switch_mode()
-                st.rerun()
-        
-        # Dynamic content based on mode
-        if st.session_state.is_kid_mode:
-            st.header("Meet Professor Atom! 🧪")
-            st.markdown("""
-            Hi there, young scientist! 👋
-            
-            I'm here to help you:
-            - 🔎 Find a cool science question
-            - 🤔 Make a guess (that's a hypothesis!)
-            - 🧪 Test your ideas with experiments
-            - 📝 Record what happens
-            - 🎯 Figure out what it all means
-            
-            I won't give you the answers - that's YOUR job as a scientist! But I'll help you discover them yourself! 🚀
-            """)
-        else:
-            st.header("Parent Resource Center 📚")
-            st.markdown("""
-            Welcome to the parent support section. Here you'll find:
-            
-            - 📅 Timeline management tips
-            - 🧠 Age-appropriate guidance
-            - 🔍 How to ask guiding questions
-            - 📊 Documentation strategies
-            - 🏆 Science fair preparation help
-            
-            Our goal is to help you support your child's learning journey while fostering independence and scientific thinking.
-            """)
-        
-        # Session controls
-        st.subheader("Session")
-        if st.button("🔄 Start Over", key="new_session"):
-            st.session_state.messages = []
-            # Create a new agent instance to clear memory
-            st.session_state.bot = ScienceExplorerBot(is_kid_mode=st.session_state.is_kid_mode)
-            st.rerun()
-        
-        # Dynamic suggestions based on mode
-        st.subheader("Need Ideas? Try These!")
-        suggestions = get_science_fair_suggestions(st.session_state.is_kid_mode)
-        for i in range(0, len(suggestions), 2):
-            cols = st.columns(2)
-            for j in range(2):
-                if i + j < len(suggestions):
-                    suggestion = suggestions[i + j]
-                    if cols[j].button(suggestion, key=f"suggestion_{i+j}"):
-                        st.session_state.suggestion_clicked = suggestion
-                        st.rerun()
-        
-        # Scientific Method reminder
-        if st.session_state.is_kid_mode:
-            st.markdown("""
-            ### 🔍 Scientific Method
-            1. Ask a question ❓
-            2. Make a guess (hypothesis) 🤔
-            3. Test with an experiment 🧪
-            4. Record what happens 📝
-            5. Share what you learned! 🌟
-            """)
-        else:
-            st.markdown("""
-            ### 📋 Science Fair Checklist
-            - Choose age-appropriate topic
-            - Guide question formulation  
-            - Help gather materials safely
-            - Assist with documentation
-            - Support independence
-            - Practice presentation
-            - Prepare display board
-            """)
-        
-        st.markdown("""
-        <footer>
-            Hackett Elementary School Science Fair
-        </footer>
-        """, unsafe_allow_html=True)
-        st.markdown("</div>", unsafe_allow_html=True)
-    
-    # Chat interface
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-    
-    # Handle suggestion clicks
-    if st.session_state.suggestion_clicked is not None:
-        suggestion = st.session_state.suggestion_clicked
-        st.session_state.suggestion_clicked = None  # Reset after handling
-        
-        # Add user message to display
-        with st.chat_message("user"):
-            st.markdown(suggestion)
-        st.session_state.messages.append({"role": "user", "content": suggestion})
-        
-        # Generate response with context
-        with st.chat_message("assistant"):
-            with st.spinner("Thinking of science ideas..." if st.session_state.is_kid_mode else "Researching educational approaches..."):
-                response = st.session_state.bot.run(suggestion)
-                st.markdown(response.content)
-                
-        # Add assistant response to UI history
-        st.session_state.messages.append({"role": "assistant", "content": response.content})
-    
-    # If there are no messages yet, display a welcome message
-    if not st.session_state.messages:
-        with st.chat_message("assistant"):
-            if st.session_state.is_kid_mode:
-                welcome_message = """
-                # Hello, future scientist! 👋🔬
-                
-                I'm **Professor Atom**, and I'm SUPER excited to help you with your Hackett Elementary Science Fair project! 🚀
-                
-                Science is like being a detective who solves nature's mysteries! ✨ We're going to:
-                
-                1. Ask awesome questions ❓
-                2. Make cool guesses 🤔
-                3. Test our ideas with experiments 🧪
-                4. Write down what happens 📝
-                5. Figure out what it all means! 🧠
-                
-                What kind of science stuff are you interested in? Plants? 🌱 Animals? 🐾 Weather? 🌦️ Space? 🪐 Tell me what you're curious about, and we'll start exploring together!
-                
-                Remember - real scientists don't know all the answers... they just know how to find them! 🔍
-                """
-            else:
-                welcome_message = """
-                # Welcome to the Science Fair Parent Support Center
-                
-                Thank you for helping your child navigate their science fair journey at Hackett Elementary. My name is Dr. Morgan, and I'm here to provide guidance that helps you support your young scientist while fostering their independence and critical thinking skills.
-                
-                The elementary school science fair is about:
-                - Developing curiosity and scientific thinking 🧠
-                - Learning the scientific method through hands-on experience 🔍
-                - Building confidence in problem-solving abilities 💪
-                - Creating documentation and presentation skills 📊
-                
-                What aspect of the science fair process would you like guidance on? Are you looking for project ideas, timeline planning, materials assistance, or strategies to support without taking over?
-                """
-            st.markdown(welcome_message)
-            # Add this initial message to the history
-            st.session_state.messages.append({"role": "assistant", "content": welcome_message})
-            # Send to agent memory
-            st.session_state.bot.run("Initialize conversation with appropriate welcome message")
-    
-    # Chat input
-    if st.session_state.is_kid_mode:
-        prompt = st.chat_input("What's your science question? 🔍")
-    else:
-        prompt = st.chat_input("How can I help with your child's science fair project?")
-        
-    if prompt:
-        # Add user message to display
-        with st.chat_message("user"):
-            st.markdown(prompt)
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        
-        # Generate response with context
-        with st.chat_message("assistant"):
-            with st.spinner("Thinking of science ideas..." if st.session_state.is_kid_mode else "Researching educational approaches..."):
-                response = st.session_state.bot.run(prompt)
-                st.markdown(response.content)
-                
-        # Add assistant response to UI history
-        st.session_state.messages.append({"role": "assistant", "content": response.content})
-    
-    st.markdown("---")
-    if st.session_state.is_kid_mode:
-        st.markdown(
-            "*Where curious kids become awesome scientists!* 🔬✨"
-        )
-    else:
-        st.markdown(
-            "*Supporting the next generation of scientific thinkers* 🔬📚"
-        )
-
-if __name__ == "__main__":
-    main()
+"""
+Science Explorer Bot - A Streamlit app for elementary school science fair projects
+Provides guided support for scientific exploration and project development.
+
+Run `pip install streamlit agno` to install dependencies.
+"""
+
+import streamlit as st
+import functools
+import os
+import time
+import uuid
+import datetime
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from async_runner import BackgroundLoop, SessionRunner
+from chat_history import TranscriptPager
+from conversation_window import ConversationWindow, run_text
+from metrics import MetricsRecorder
+from model_pool import ModelClientPool
+from model_router import ModelRouter
+from page_content import FOOTER_HTML, STYLE_HTML, get_page_content
+from prefetch import Prefetcher, SpeculativeAnswers, predict_next_prompts
+from prescreen import CONTEXT_FREE_CATEGORIES, PreScreen
+from prompts import ACTIVE_PROFILE, MODEL_ID, PROFILES, get_instructions, get_suggestions
+from response_cache import ResponseCache, hash_instructions, make_key
+from scheduler import RequestScheduler
+from session_store import SessionRecord, SessionStore
+from similarity_cache import SimilarityCache
+from suggestion_answers import SuggestionAnswers
+
+if TYPE_CHECKING:
+    # agno and the groq SDK are imported on a bot's first model call, not on page load
+    from agno.agent import Agent
+
+# Set page configuration
+st.set_page_config(
+    page_title="Science Explorer Bot 🔬",
+    page_icon="🔬",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Custom CSS for kid-friendly aesthetics, minified once per process
+st.markdown(STYLE_HTML, unsafe_allow_html=True)
+
+class ScienceExplorerBot:
+    def __init__(
+        self,
+        is_kid_mode=True,
+        response_cache: Optional[ResponseCache] = None,
+        client_pool: Optional[ModelClientPool] = None,
+        window: Optional[ConversationWindow] = None,
+        similarity_cache: Optional[SimilarityCache] = None,
+        suggestion_answers: Optional[SuggestionAnswers] = None,
+        router: Optional[ModelRouter] = None,
+        prescreen: Optional[PreScreen] = None,
+        speculations: Optional[SpeculativeAnswers] = None,
+    ):
+        # Set mode (kid or parent)
+        self.is_kid_mode = is_kid_mode
+        # Keeps each request within a token budget by summarizing older turns
+        self.window = window if window is not None else ConversationWindow()
+        # Shared cache for answers to the canned suggestion prompts
+        self.response_cache = response_cache
+        # Answers to the suggestion prompts generated ahead of time by pregenerate.py
+        self.suggestion_answers = suggestion_answers
+        # Answers unsafe, empty and greeting prompts with canned replies, before any cache or model call
+        self.prescreen = prescreen
+        # This session's answers to likely next prompts, generated in the background
+        self.speculations = speculations
+        # Shared cache of answers to near-duplicate opening questions
+        self.similarity_cache = similarity_cache
+        # Prompt of the current response if its answer may go into the similarity cache
+        self._similarity_candidate: Optional[str] = None
+        # Prompt of the current response if its answer may go into the shared response cache
+        self._response_cache_candidate: Optional[str] = None
+        # Seconds until the first streamed chunk of the most recent response
+        self.last_time_to_first_token: Optional[float] = None
+        # Whether the most recent response was served from the response cache
+        self.last_response_cached = False
+        # Whether the most recent response came from a completed model call
+        self.last_response_from_model = False
+        # Cache outcome, timings and token counts of the most recent response
+        self.last_turn_metrics: Dict[str, Any] = {}
+        # Agent runs dropped from memory by compact(), counted from the start of the conversation
+        self.runs_offset = 0
+        self._client_pool = client_pool
+        self._router = router
+        # Built by the agent property on first use
+        self._agent: Optional["Agent"] = None
+        # (user or None for the welcome message, assistant) turns recorded before the agent exists
+        self._pending_turns: List[Tuple[Optional[str], str]] = []
+    
+    @property
+    def agent(self) -> "Agent":
+        """The agno agent, built on first use so that agno and the groq SDK load with the first model call."""
+        if self._agent is None:
+            from agno.agent import Agent
+            from agno.memory.agent import AgentMemory
+
+            from groq_models import RoutedGroq
+
+            # Initialize agent with Groq model and built-in memory.
+            # The model's HTTP client comes from the shared pool when one is given,
+            # and streamed calls are hedged across backends by the router.
+            # The compiled instruction profile is the whole system prompt, including
+            # the markdown directive, so agno's description and markdown blocks are left out.
+            self._agent = Agent(
+                model=RoutedGroq(
+                    id=MODEL_ID,
+                    pool=self._client_pool,
+                    router=self._router,
+                ),
+                instructions=self._get_instructions(),
+                memory=AgentMemory(),
+                add_history_to_messages=True,
+            )
+            pending, self._pending_turns = self._pending_turns, []
+            for user, assistant in pending:
+                self._record_turn(user, assistant)
+        return self._agent
+    
+    def _get_instructions(self) -> List[str]:
+        """Define the behavior and guardrails for the Science Explorer bot."""
+        return get_instructions(self.is_kid_mode)
+    
+    async def arun_stream(self, prompt: str, use_cache: bool = False) -> AsyncIterator[str]:
+        """Stream the agent's response as text chunks while it is generated, on the agent's async run.
+
+        With `use_cache`, a cached answer for the same prompt, mode, model and
+        instructions is served without calling the model, and a fresh answer is
+        stored once the stream completes.
+
+        The agent only records the turn in its memory once the stream has been
+        fully consumed, so callers should always exhaust the generator.
+        Cancelling the consuming task aborts the underlying HTTP request.
+        """
+        start = time.perf_counter()
+        cached = self._begin_response(prompt, use_cache)
+        if cached is not None:
+            self.last_time_to_first_token = time.perf_counter() - start
+            yield cached
+            return
+
+        parts = []
+        try:
+            async for chunk in await self.agent.arun(prompt, stream=True):
+                if not chunk.content:
+                    continue
+                if self.last_time_to_first_token is None:
+                    self.last_time_to_first_token = time.perf_counter() - start
+                parts.append(chunk.content)
+                yield chunk.content
+        finally:
+            # agno keeps `stream` switched on after a streamed run, which would
+            # turn later plain `run()` calls into generators
+            self.agent.stream = None
+
+        self._finish_response(prompt, parts, use_cache, start)
+    
+    @property
+    def fallback_message(self) -> str:
+        """Friendly reply shown when the model is too slow or unavailable."""
+        if self.is_kid_mode:
+            return "Oops! My science brain is taking a little nap 😴🔬 Can you ask me that again?"
+        return "Sorry, that took longer than expected. Please try your question again in a moment."
+    
+    def seed_welcome(self, content: str):
+        """Record the static welcome message as the opening assistant turn, without calling the model."""
+        self._record_turn(None, content)
+    
+    @property
+    def mode(self) -> str:
+        """Name of the current mode, used to key shared caches."""
+        return "kid" if self.is_kid_mode else "parent"
+    
+    def has_cached_response(self, prompt: str, use_cache: bool = True) -> bool:
+        """Whether prompt can be answered by the pre-screen or a cache right now, without a model call."""
+        if self.speculations is not None and self.speculations.contains(self.conversation_state, prompt):
+            return True
+        if not use_cache and self.prescreen is not None and self.prescreen.screen(self.mode, prompt, record_stats=False):
+            return True
+        if use_cache:
+            key = self._cache_key(prompt)
+            return (self.suggestion_answers is not None and self.suggestion_answers.contains(key)) or (
+                self.response_cache is not None and self.response_cache.contains(key)
+            )
+        if self.similarity_cache is not None and self.is_context_free():
+            return self.similarity_cache.lookup(self._similarity_namespace(), prompt, record_stats=False) is not None
+        return False
+    
+    def is_context_free(self) -> bool:
+        """Whether the user hasn't said anything yet, so an answer can't depend on earlier turns."""
+        return not self.window.summary_lines and not any(user for user, _ in self._turns())
+    
+    def _begin_response(self, prompt: str, use_cache: bool) -> Optional[str]:
+        """Reset per-response stats and return a canned or cached answer if one can be served.
+
+        Otherwise fit the conversation into the token budget for a model call.
+        """
+        self.last_time_to_first_token = None
+        self.last_response_cached = False
+        self.last_response_from_model = False
+        self.last_turn_metrics = {"cache": None, "prescreen": None}
+        self._similarity_candidate = None
+        self._response_cache_candidate = None
+        if self.speculations is not None:
+            speculated = self.speculations.take(self.conversation_state, prompt)
+            # The rest was speculated for the conversation as it was before this prompt
+            self.speculations.discard()
+            if speculated is not None:
+                self._remember_turn(prompt, speculated)
+                self.last_response_cached = True
+                self.last_turn_metrics["cache"] = "prefetch"
+                return speculated
+        if not use_cache and self.prescreen is not None:
+            # Suggestion prompts are vetted already, so only free text is screened
+            started_at = time.perf_counter()
+            screened = self.prescreen.screen(self.mode, prompt)
+            self.last_turn_metrics["prescreen_us"] = (time.perf_counter() - started_at) * 1e6
+            if screened is not None:
+                category, reply = screened
+                self._remember_screened(prompt, category, reply)
+                self.last_turn_metrics["prescreen"] = category
+                return reply
+        cached = None
+        if use_cache:
+            key = self._cache_key(prompt)
+            if self.suggestion_answers is not None:
+                cached = self.suggestion_answers.get(key)
+                cache_name = "pregenerated"
+            if cached is None and self.response_cache is not None:
+                cached = self.response_cache.get(key)
+                cache_name = "response"
+                # A fresh answer is generated with this session's history, so only
+                # an opening one is safe to share with every other session
+                if self.is_context_free():
+                    self._response_cache_candidate = prompt
+        elif self.similarity_cache is not None and self.is_context_free():
+            # Only opening questions are eligible, so a cached answer never ignores the conversation
+            cached = self.similarity_cache.lookup(self._similarity_namespace(), prompt)
+            cache_name = "similarity"
+            self._similarity_candidate = prompt
+        if cached is not None:
+            self._remember_turn(prompt, cached)
+            self.last_response_cached = True
+            self.last_turn_metrics["cache"] = cache_name
+            return cached
+        self.last_turn_metrics["prompt_tokens_estimate"] = self.window.prepare(self.agent, prompt)
+        return None
+    
+    def _finish_response(self, prompt: str, parts: List[str], use_cache: bool, started_at: float):
+        """Record the model call's metrics and store a fresh answer in the response or similarity cache."""
+        self.last_turn_metrics["model_ms"] = (time.perf_counter() - started_at) * 1000
+        usage = (self.agent.run_response.metrics or {}) if self.agent.run_response is not None else {}
+        for field, key in (("prompt_tokens", "input_tokens"), ("completion_tokens", "output_tokens")):
+            if usage.get(key):
+                # Earlier entries belong to replayed history messages
+                self.last_turn_metrics[field] = usage[key][-1]
+        if not parts:
+            return
+        self.last_response_from_model = True
+        if self._response_cache_candidate == prompt:
+            self.response_cache.put(self._cache_key(prompt), "".join(parts))
+        elif self._similarity_candidate == prompt:
+            self.similarity_cache.add(self._similarity_namespace(), prompt, "".join(parts))
+    
+    def _similarity_namespace(self) -> str:
+        """Similarity index for the current mode, model and instructions."""
+        return f"{self.mode}:{MODEL_ID}:{hash_instructions(self._get_instructions())}"
+    
+    def _cache_key(self, prompt: str):
+        """Key identifying this prompt's answer under the current mode and instructions."""
+        return make_key(self.mode, prompt, MODEL_ID, hash_instructions(self._get_instructions()))
+    
+    def _remember_turn(self, prompt: str, content: str):
+        """Record a user/assistant turn in the agent's memory without calling the model."""
+        self._record_turn(prompt, content)
+    
+    def _remember_screened(self, prompt: str, category: str, reply: str):
+        """Record a canned reply; small talk is kept without its prompt, so it doesn't count as user context."""
+        self._record_turn(None if category in CONTEXT_FREE_CATEGORIES else prompt, reply)
+    
+    def _record_turn(self, prompt: Optional[str], content: str):
+        """Add a turn to the agent's memory, or keep it until the agent is built.
+
+        prompt is None for the welcome message, which has no user side.
+        """
+        if self._agent is None:
+            self._pending_turns.append((prompt, content))
+            return
+        from agno.memory.agent import AgentRun
+        from agno.models.message import Message
+        from agno.run.response import RunResponse
+
+        assistant_message = Message(role="assistant", content=content)
+        user_message = Message(role="user", content=prompt) if prompt else None
+        messages = [user_message, assistant_message] if user_message is not None else [assistant_message]
+        self._agent.memory.add_messages(messages)
+        self._agent.memory.add_run(
+            AgentRun(message=user_message, response=RunResponse(content=content, messages=messages))
+        )
+    
+    def _turns(self) -> List[Tuple[Optional[str], str]]:
+        """(user or None, assistant) text of each turn held in memory, oldest first."""
+        if self._agent is None:
+            return list(self._pending_turns)
+        return [(user or None, assistant) for user, assistant in map(run_text, self._agent.memory.runs)]
+    
+    def switch_mode(self):
+        """Switch between kid and parent modes, keeping the conversation history."""
+        self.is_kid_mode = not self.is_kid_mode
+        # The system message is rebuilt from the instructions on every run
+        if self._agent is not None:
+            self._agent.instructions = self._get_instructions()
+        return self.is_kid_mode
+    
+    def reset(self):
+        """Forget the conversation while keeping the agent and its model client."""
+        if self._agent is not None:
+            from agno.memory.agent import AgentMemory
+
+            self._agent.memory = AgentMemory()
+        self._pending_turns = []
+        self.window.reset()
+        self.runs_offset = 0
+        if self.speculations is not None:
+            self.speculations.discard()
+    
+    @property
+    def conversation_state(self) -> Tuple[str, int]:
+        """Mode and number of turns so far; speculative answers are only valid in the state they were made for."""
+        return self.mode, self.runs_offset + len(self._turns())
+    
+    @property
+    def folded_turns(self) -> int:
+        """Turns, from the start of the conversation, already covered by the window summary."""
+        return self.runs_offset + self.window.folded_runs
+    
+    def turns_since(self, start: int) -> List[Tuple[Optional[str], str]]:
+        """(user, assistant) text of each turn from start onward, counted from the start of the conversation."""
+        return self._turns()[max(0, start - self.runs_offset):]
+    
+    def restore(self, turns: List[Tuple[Optional[str], str]], summary_lines: List[str], folded_turns: int):
+        """Rebuild memory from saved turns that follow the first folded_turns, which summary_lines cover."""
+        self.reset()
+        for user, assistant in turns:
+            if user:
+                self._remember_turn(user, assistant)
+            else:
+                self.seed_welcome(assistant)
+        self.window.summary_lines = list(summary_lines)
+        self.runs_offset = folded_turns
+    
+    def compact(self) -> int:
+        """Drop runs already folded into the window summary from memory and return how many went.
+
+        Only call this once those runs have been saved elsewhere.
+        """
+        dropped = self.window.folded_runs
+        if not dropped or self._agent is None:
+            return 0
+        memory = self.agent.memory
+        memory.runs = memory.runs[dropped:]
+        kept = {id(message) for run in memory.runs if run.response for message in run.response.messages or []}
+        memory.messages = [message for message in memory.messages if message.role == "system" or id(message) in kept]
+        self.window.folded_runs = 0
+        self.runs_offset += dropped
+        return dropped
+    
+    @property
+    def prompt_token_counts(self) -> List[int]:
+        """Estimated prompt tokens for each turn sent to the model, oldest first."""
+        return self.window.prompt_tokens
+
+def get_science_fair_suggestions(is_kid_mode):
+    """Return a list of suggested science fair topics for quick prompts."""
+    return get_suggestions(is_kid_mode)
+
+@st.cache_resource
+def get_client_pool() -> ModelClientPool:
+    """Return the model client pool shared by every session in this process."""
+    return ModelClientPool()
+
+@st.cache_resource
+def get_background_loop() -> BackgroundLoop:
+    """Return the event loop that runs model calls for every session in this process."""
+    return BackgroundLoop()
+
+@st.cache_resource
+def get_model_router() -> ModelRouter:
+    """Return the router that hedges and fails over model calls for every session in this process.
+
+    SCIENCE_BOT_MODELS is a comma-separated list of Groq model ids in order of
+    preference (the app's model alone by default). SCIENCE_BOT_HEDGE_PERCENTILE
+    sets the time-to-first-token percentile after which a hedge is sent. With a
+    single model a hedge repeats the request on it. Every hedge spends a token
+    from the scheduler's rate bucket, so hedges stay within
+    SCIENCE_BOT_REQUESTS_PER_MINUTE.
+    """
+    models = [model.strip() for model in os.getenv("SCIENCE_BOT_MODELS", MODEL_ID).split(",") if model.strip()]
+    return ModelRouter(
+        models,
+        hedge_percentile=float(os.getenv("SCIENCE_BOT_HEDGE_PERCENTILE", "95")),
+        admit_hedge=get_scheduler().bucket.try_take,
+    )
+
+@st.cache_resource
+def get_scheduler() -> RequestScheduler:
+    """Return the scheduler that admits model calls from every session in this process.
+
+    SCIENCE_BOT_MAX_CONCURRENT and SCIENCE_BOT_REQUESTS_PER_MINUTE should match
+    the provider quota.
+    """
+    return RequestScheduler(
+        max_concurrent=int(os.getenv("SCIENCE_BOT_MAX_CONCURRENT", "8")),
+        requests_per_minute=float(os.getenv("SCIENCE_BOT_REQUESTS_PER_MINUTE", "30")),
+    )
+
+@st.cache_resource
+def get_similarity_cache() -> SimilarityCache:
+    """Return the near-duplicate question cache shared by every session in this process.
+
+    SCIENCE_BOT_SIMILARITY_THRESHOLD sets the cosine similarity needed for a hit.
+    """
+    return SimilarityCache(threshold=float(os.getenv("SCIENCE_BOT_SIMILARITY_THRESHOLD", "0.85")))
+
+@st.cache_resource
+def get_metrics() -> MetricsRecorder:
+    """Return the metrics recorder shared by every session in this process.
+
+    Events go to the rotating JSONL log at SCIENCE_BOT_METRICS_PATH; set it to an
+    empty string to keep metrics in memory only.
+    """
+    return MetricsRecorder(path=os.getenv("SCIENCE_BOT_METRICS_PATH", "science_bot_metrics.jsonl") or None)
+
+@st.cache_resource
+def get_session_store() -> Optional[SessionStore]:
+    """Return the SQLite session store shared by every session in this process.
+
+    SCIENCE_BOT_SESSION_DB sets the database file (an empty string disables
+    persistence). Sessions idle for more than SCIENCE_BOT_SESSION_TTL_DAYS are
+    deleted at startup.
+    """
+    path = os.getenv("SCIENCE_BOT_SESSION_DB", "science_bot_sessions.db")
+    if not path:
+        return None
+    store = SessionStore(path)
+    store.prune(float(os.getenv("SCIENCE_BOT_SESSION_TTL_DAYS", "30")) * 24 * 60 * 60)
+    return store
+
+@st.cache_resource
+def get_suggestion_answers() -> SuggestionAnswers:
+    """Return the pre-generated suggestion answers, read from disk on the first suggestion click.
+
+    SCIENCE_BOT_SUGGESTION_ANSWERS points at the artifact written by pregenerate.py.
+    """
+    return SuggestionAnswers(os.getenv("SCIENCE_BOT_SUGGESTION_ANSWERS", "suggestion_answers.json"))
+
+@st.cache_resource
+def get_prescreen() -> Optional[PreScreen]:
+    """Return the prompt pre-screen shared by every session in this process.
+
+    Set SCIENCE_BOT_PRESCREEN=0 to send every free-text prompt to the model.
+    """
+    if os.getenv("SCIENCE_BOT_PRESCREEN", "1") == "0":
+        return None
+    return PreScreen()
+
+@st.cache_resource
+def get_prefetcher() -> Optional[Prefetcher]:
+    """Return the speculative prefetcher shared by every session in this process.
+
+    SCIENCE_BOT_PREFETCH_TOP_K sets how many likely next prompts are answered
+    ahead of time after each turn (0 turns prefetching off), and
+    SCIENCE_BOT_PREFETCH_BUDGET_TOKENS caps the tokens one session may spend on it.
+    """
+    top_k = int(os.getenv("SCIENCE_BOT_PREFETCH_TOP_K", "3"))
+    if top_k <= 0:
+        return None
+    return Prefetcher(
+        get_background_loop(),
+        scheduler=get_scheduler(),
+        top_k=top_k,
+        session_budget_tokens=int(os.getenv("SCIENCE_BOT_PREFETCH_BUDGET_TOKENS", "8000")),
+    )
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """Return the response cache shared by every session in this process.
+
+    Set SCIENCE_BOT_CACHE_PATH to keep cached answers across restarts.
+    """
+    return ResponseCache(path=os.getenv("SCIENCE_BOT_CACHE_PATH"))
+
+def initialize_chat_history():
+    """Initialize session state variables for chat history."""
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+    if "suggestion_clicked" not in st.session_state:
+        st.session_state.suggestion_clicked = None
+    if "is_kid_mode" not in st.session_state:
+        st.session_state.is_kid_mode = True
+    if "history_pager" not in st.session_state:
+        st.session_state.history_pager = TranscriptPager()
+    if "history_pages_shown" not in st.session_state:
+        st.session_state.history_pages_shown = 0
+
+def start_session():
+    """Create the bot, resuming the session named in the URL from the session store if there is one.
+
+    Only the recent tail of the transcript and the turns not yet folded into
+    the window summary are loaded; older messages are read when scrolled back to.
+    """
+    store = get_session_store()
+    session_id = st.query_params.get("session")
+    record = store.load(session_id) if store is not None and session_id else None
+    if record is None:
+        session_id = uuid.uuid4().hex
+        record = SessionRecord(is_kid_mode=st.session_state.is_kid_mode)
+        if store is not None:
+            # Lets a reload or reconnect find the session again
+            st.query_params["session"] = session_id
+    st.session_state.session_id = session_id
+    st.session_state.session_record = record
+    st.session_state.is_kid_mode = record.is_kid_mode
+    bot = ScienceExplorerBot(
+        is_kid_mode=record.is_kid_mode,
+        response_cache=get_response_cache(),
+        client_pool=get_client_pool(),
+        similarity_cache=get_similarity_cache(),
+        suggestion_answers=get_suggestion_answers(),
+        router=get_model_router(),
+        prescreen=get_prescreen(),
+        speculations=SpeculativeAnswers(get_prefetcher()) if get_prefetcher() is not None else None,
+    )
+    if store is not None:
+        pager = TranscriptPager(loader=functools.partial(store.messages, session_id))
+        pager.offset = pager.tail_start(record.message_count)
+        st.session_state.history_pager = pager
+        st.session_state.messages = store.messages(session_id, pager.offset)
+        if record.turn_count:
+            bot.restore(store.turns(session_id, record.folded_turns), record.summary_lines, record.folded_turns)
+    st.session_state.bot = bot
+
+def persist_session():
+    """Append the session's new messages and agent turns to the session store.
+
+    Saved messages in archived history pages and turns folded into the window
+    summary are then dropped from memory, so a long session holds only its
+    recent window.
+    """
+    store = get_session_store()
+    if store is None:
+        return
+    record = st.session_state.session_record
+    messages = st.session_state.messages
+    pager = st.session_state.history_pager
+    bot = st.session_state.bot
+    runner = st.session_state.runner
+    turns, summary_lines, folded_turns = runner.run_exclusive(
+        lambda: (bot.turns_since(record.turn_count), list(bot.window.summary_lines), bot.folded_turns)
+    )
+    new_messages = messages[record.message_count - pager.offset:]
+    state = (bot.is_kid_mode, summary_lines, folded_turns)
+    if not new_messages and not turns and state == (record.is_kid_mode, record.summary_lines, record.folded_turns):
+        return
+    record.is_kid_mode, record.summary_lines, record.folded_turns = state
+    if store.append(st.session_state.session_id, record, new_messages, turns):
+        runner.run_exclusive(bot.compact)
+        pager.trim(messages)
+
+def prefetch_next_answers():
+    """Start generating answers to the prompts the user is most likely to send next.
+
+    Each answer comes from a throwaway bot restored to the current
+    conversation, so the session's own agent is never touched.
+    """
+    bot = st.session_state.bot
+    if bot.speculations is None:
+        return
+    runner = st.session_state.runner
+    state, turns, summary_lines, folded_turns = runner.run_exclusive(
+        lambda: (bot.conversation_state, bot.turns_since(bot.folded_turns), list(bot.window.summary_lines), bot.folded_turns)
+    )
+    # Suggestions with a cached answer are instant already
+    suggestions = [
+        suggestion for suggestion in get_science_fair_suggestions(bot.is_kid_mode)
+        if not bot.has_cached_response(suggestion)
+    ]
+    last_user, last_reply = turns[-1] if turns else (None, "")
+    asked = [message["content"] for message in st.session_state.messages if message["role"] == "user"]
+    prompts = predict_next_prompts(
+        bot.mode, suggestions, f"{last_user or ''} {last_reply}", asked, bot.speculations.prefetcher.top_k
+    )
+    is_kid_mode = bot.is_kid_mode
+    client_pool = get_client_pool()
+
+    async def generate(prompt: str):
+        speculative_bot = ScienceExplorerBot(is_kid_mode=is_kid_mode, client_pool=client_pool)
+        speculative_bot.restore(turns, summary_lines, folded_turns)
+        content = "".join([chunk async for chunk in speculative_bot.arun_stream(prompt)])
+        metrics = speculative_bot.last_turn_metrics
+        return content, (metrics.get("prompt_tokens") or 0) + (metrics.get("completion_tokens") or 0)
+
+    bot.speculations.prefetch(state, prompts, generate)
+
+def stream_response(prompt: str, use_cache: bool = False) -> str:
+    """Stream the bot's reply into the current chat message and return the full text."""
+    queue_status = st.empty()
+
+    def show_queue_position():
+        position = st.session_state.runner.queue_position()
+        if position is None:
+            queue_status.empty()
+        elif st.session_state.is_kid_mode:
+            queue_status.caption(
+                "🚦 Lots of scientists are asking questions! You're next! 🙌" if position == 0
+                else f"🚦 Lots of scientists are asking questions! {position} ahead of you ⏳"
+            )
+        else:
+            queue_status.caption(
+                "High demand right now. Your question is next in line." if position == 0
+                else f"High demand right now. {position} requests ahead of yours."
+            )
+
+    chunks = st.session_state.runner.stream(
+        st.session_state.bot, prompt, use_cache=use_cache, on_wait=show_queue_position
+    )
+    # Keep the spinner up only until the first chunk arrives
+    with st.spinner("Thinking of science ideas..." if st.session_state.is_kid_mode else "Researching educational approaches..."):
+        first_chunk = next(chunks, "")
+    queue_status.empty()
+
+    def all_chunks():
+        yield first_chunk
+        yield from chunks
+
+    return st.write_stream(all_chunks())
+
+def add_user_message(content: str):
+    """Show and record a user message, unless it repeats the unanswered one at the end of the chat."""
+    messages = st.session_state.messages
+    if messages and messages[-1] == {"role": "user", "content": content}:
+        # A double click or interrupted rerun; the history loop already shows it
+        return
+    with st.chat_message("user"):
+        st.markdown(content)
+    messages.append({"role": "user", "content": content})
+
+def respond(prompt: str, use_cache: bool = False) -> float:
+    """Stream the bot's reply to prompt, add it to the chat history and return the seconds it took."""
+    started_at = time.perf_counter()
+    with st.chat_message("assistant"):
+        response_text = stream_response(prompt, use_cache=use_cache)
+    st.session_state.messages.append({
+        "role": "assistant",
+        "content": response_text,
+        "time_to_first_token": st.session_state.bot.last_time_to_first_token,
+    })
+    elapsed = time.perf_counter() - started_at
+
+    bot = st.session_state.bot
+    ttft = bot.last_time_to_first_token
+    get_metrics().record(
+        "turn",
+        bot.mode,
+        session_id=st.session_state.runner.session_id,
+        turn_ms=elapsed * 1000,
+        ttft_ms=ttft * 1000 if ttft is not None else None,
+        **bot.last_turn_metrics,
+    )
+    return elapsed
+
+def start_over(session_state):
+    """Forget the conversation shown and stored for a session, as the Start Over button does.
+
+    Takes the session state explicitly so the load test can drive it through AppTest.
+    """
+    session_state.messages = []
+    session_state.history_pages_shown = 0
+    # Clear the agent's memory; the agent and its client are reused
+    session_state.runner.cancel()
+    session_state.bot.reset()
+    store = get_session_store()
+    if store is not None:
+        store.delete(session_state.session_id)
+        session_state.session_record = SessionRecord(is_kid_mode=session_state.is_kid_mode)
+        session_state.history_pager = TranscriptPager(
+            loader=functools.partial(store.messages, session_state.session_id)
+        )
+
+def show_earlier_messages():
+    st.session_state.history_pages_shown += 1
+
+def hide_earlier_messages():
+    st.session_state.history_pages_shown = 0
+
+def render_chat_history():
+    """Draw the transcript with a bounded number of elements per rerun.
+
+    Recent messages are chat bubbles. Older ones stay collapsed until asked
+    for, and are then shown as pre-compiled markdown pages.
+    """
+    messages = st.session_state.messages
+    pager = st.session_state.history_pager
+    archived = pager.archived_pages(messages)
+    shown = min(st.session_state.history_pages_shown, archived)
+    if archived:
+        hidden = (archived - shown) * pager.page_size
+        col1, col2 = st.columns(2)
+        if shown < archived:
+            col1.button(f"⬆️ Show earlier messages ({hidden} hidden)", key="show_earlier", on_click=show_earlier_messages)
+        if shown:
+            col2.button("⬇️ Hide earlier messages", key="hide_earlier", on_click=hide_earlier_messages)
+    for index in range(archived - shown, archived):
+        with st.container(border=True):
+            st.markdown(pager.page(messages, index))
+    for message in pager.recent(messages):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+# Streamlit versions with fragments rerun only the transcript when its own buttons are clicked
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+if _fragment is not None:
+    render_chat_history = _fragment(render_chat_history)
+
+def is_admin() -> bool:
+    """Whether the page was opened with ?admin=<SCIENCE_BOT_ADMIN_TOKEN>."""
+    token = os.getenv("SCIENCE_BOT_ADMIN_TOKEN")
+    return bool(token) and st.query_params.get("admin") == token
+
+def render_metrics_panel():
+    """Admin-only sidebar panel with rolling performance stats."""
+    with st.expander("📈 Performance (admin)"):
+        st.caption("Rolling percentiles per mode (ms or tokens)")
+        st.dataframe(get_metrics().summary(), hide_index=True)
+        runner = st.session_state.runner
+        st.json({
+            "scheduler": get_scheduler().stats(),
+            "model_router": get_model_router().stats(),
+            "suggestion_answers": get_suggestion_answers().stats(),
+            "instruction_profiles": {
+                "active": ACTIVE_PROFILE,
+                **{f"{name}/{mode}": f"{profile.tokens}/{profile.budget} tokens" for (name, mode), profile in PROFILES.items()},
+            },
+            "prescreen": get_prescreen().stats() if get_prescreen() is not None else None,
+            "prefetch": get_prefetcher().stats() if get_prefetcher() is not None else None,
+            "response_cache": get_response_cache().stats(),
+            "similarity_cache": get_similarity_cache().stats(),
+            "this_session": {
+                "cancelled": runner.cancelled,
+                "coalesced": runner.coalesced,
+                "timed_out": runner.timed_out,
+                "prompt_tokens": st.session_state.bot.prompt_token_counts[-10:],
+            },
+        })
+
+def main():
+    rerun_started_at = time.perf_counter()
+    # Time spent waiting on model replies, excluded from the rerun duration
+    reply_seconds = 0.0
+    
+    # Initialize chat history and session state
+    initialize_chat_history()
+    
+    # Initialize bot if not already done
+    if 'bot' not in st.session_state:
+        start_session()
+    if 'runner' not in st.session_state:
+        st.session_state.runner = SessionRunner(
+            get_background_loop(),
+            scheduler=get_scheduler(),
+            session_id=st.session_state.session_id,
+        )
+    
+    # App title and description
+    page = get_page_content(st.session_state.is_kid_mode)
+    st.title(page.title)
+    st.markdown(page.intro)
+    mode_container = st.empty()
+    with mode_container.container():
+        st.markdown(page.banner_html, unsafe_allow_html=True)
+    
+    # Sidebar with information and controls
+    with st.sidebar:
+        st.image(page.image, width=100)
+        
+        st.markdown("<div class='sidebar-content'>", unsafe_allow_html=True)
+        
+        # Mode switch
+        st.subheader("👨‍👩‍👧‍👦 Choose Your Mode 👦👧")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Kid Mode" if not st.session_state.is_kid_mode else "✓ Kid Mode", 
+                        disabled=st.session_state.is_kid_mode):
+                st.session_state.is_kid_mode = True
+                st.session_state.bot.switch_mode()
+                st.rerun()
+        with col2:
+            if st.button("Parent Mode" if st.session_state.is_kid_mode else "✓ Parent Mode", 
+                        disabled=not st.session_state.is_kid_mode):
+                st.session_state.is_kid_mode = False
+                st.session_state.bot.switch_mode()
+                st.rerun()
+        
+        # Dynamic content based on mode
+        st.header(page.sidebar_header)
+        st.markdown(page.sidebar_markdown)
+        
+        # Session controls
+        st.subheader("Session")
+        if st.button("🔄 Start Over", key="new_session"):
+            start_over(st.session_state)
+            st.rerun()
+        
+        # Dynamic suggestions based on mode
+        st.subheader("Need Ideas? Try These!")
+        suggestions = get_science_fair_suggestions(st.session_state.is_kid_mode)
+        for i in range(0, len(suggestions), 2):
+            cols = st.columns(2)
+            for j in range(2):
+                if i + j < len(suggestions):
+                    suggestion = suggestions[i + j]
+                    if cols[j].button(suggestion, key=f"suggestion_{i+j}"):
+                        st.session_state.suggestion_clicked = suggestion
+                        st.rerun()
+        
+        # Scientific Method reminder
+        st.markdown(page.reminder_markdown)
+        
+        st.markdown(FOOTER_HTML, unsafe_allow_html=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        if is_admin():
+            render_metrics_panel()
+    
+    # Chat interface
+    history_started_at = time.perf_counter()
+    render_chat_history()
+    history_render_seconds = time.perf_counter() - history_started_at
+    
+    # Handle suggestion clicks
+    suggestion = st.session_state.suggestion_clicked
+    if suggestion is not None:
+        st.session_state.suggestion_clicked = None  # Reset after handling
+        
+        # Add user message to display
+        add_user_message(suggestion)
+        
+        # Generate response with context.
+        # Suggestions are fixed prompts, so their answers are shared across sessions
+        reply_seconds += respond(suggestion, use_cache=True)
+    
+    # If there are no messages yet, display a welcome message
+    if not st.session_state.messages:
+        with st.chat_message("assistant"):
+            welcome_message = page.welcome
+            st.markdown(welcome_message)
+            # Add this initial message to the history
+            st.session_state.messages.append({"role": "assistant", "content": welcome_message})
+            # Seed agent memory locally so first paint never waits on the model
+            st.session_state.bot.seed_welcome(welcome_message)
+    
+    # Chat input
+    prompt = st.chat_input(page.chat_placeholder)
+        
+    if prompt:
+        # Add user message to display
+        add_user_message(prompt)
+        
+        # Generate response with context
+        reply_seconds += respond(prompt)
+    elif suggestion is None and st.session_state.messages and st.session_state.messages[-1]["role"] == "user":
+        # A rerun interrupted the last reply; join the request if it is still running
+        pending = st.session_state.messages[-1]["content"]
+        reply_seconds += respond(pending, use_cache=pending in get_science_fair_suggestions(st.session_state.is_kid_mode))
+    
+    st.markdown("---")
+    st.markdown(page.tagline)
+    
+    persist_session()
+    # Only a model answer is worth speculating after; canned and cached replies are mostly small talk or repeats
+    if reply_seconds and st.session_state.bot.last_response_from_model:
+        prefetch_next_answers()
+    
+    get_metrics().record(
+        "rerun",
+        st.session_state.bot.mode,
+        session_id=st.session_state.runner.session_id,
+        rerun_ms=(time.perf_counter() - rerun_started_at - reply_seconds) * 1000,
+        history_render_ms=history_render_seconds * 1000,
+        messages=len(st.session_state.messages),
+    )
+
+if __name__ == "__main__":
+    main()
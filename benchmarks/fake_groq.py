@@ -0,0 +1,240 @@
+"""
+Local stand-in for the Groq chat completions API, for benchmarks and load tests.
+
+Speaks enough of the OpenAI-compatible protocol (streaming and non-streaming)
+for the groq SDK, with configurable latency, token rate and error injection.
+Point the app at it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+Run `python benchmarks/fake_groq.py --port 8765` to start it on its own.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+WORDS = (
+    "Great question, young scientist! 🔬 What do you think would happen if we tried it? "
+    "Let's make a guess, test it with a simple experiment, and write down what we see. "
+).split()
+
+
+@dataclass
+class FakeGroqConfig:
+    # Seconds before the first token (or the whole body, when not streaming)
+    first_token_latency: float = 0.3
+    # Per-model overrides of first_token_latency, e.g. to slow down a primary model
+    model_first_token_latency: Dict[str, float] = field(default_factory=dict)
+    # Streaming speed once generation starts
+    tokens_per_second: float = 200.0
+    # Length of every completion
+    completion_tokens: int = 120
+    # Fraction of requests answered with HTTP 429 / HTTP 500
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    seed: Optional[int] = None
+
+
+class FakeGroqServer:
+    def __init__(self, config: Optional[FakeGroqConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeGroqConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompt_chars = 0
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGroqServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "rate_limited": self.rate_limited,
+                "errors": self.errors,
+                "max_in_flight": self.max_in_flight,
+                "prompt_chars": self.prompt_chars,
+            }
+
+    def _pick_outcome(self) -> str:
+        """Decide whether the next request fails, under the server lock."""
+        roll = self._random.random()
+        if roll < self.config.rate_limit_rate:
+            self.rate_limited += 1
+            return "rate_limited"
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            self.errors += 1
+            return "error"
+        return "ok"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    server.prompt_chars += sum(len(str(m.get("content") or "")) for m in body.get("messages", []))
+                    outcome = server._pick_outcome()
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    if outcome == "rate_limited":
+                        self._send_json(429, {"error": {"message": "Rate limit reached", "type": "tokens"}}, {"retry-after": "1"})
+                    elif outcome == "error":
+                        self._send_json(500, {"error": {"message": "Injected server error"}})
+                    elif body.get("stream"):
+                        self._stream(body)
+                    else:
+                        self._complete(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client cancelled the request
+                    pass
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _first_token_latency(self, body):
+                return server.config.model_first_token_latency.get(body.get("model"), server.config.first_token_latency)
+
+            def _words(self):
+                count = server.config.completion_tokens
+                return [WORDS[i % len(WORDS)] for i in range(count)]
+
+            def _usage(self, body):
+                prompt_tokens = sum(len(str(m.get("content") or "")) for m in body.get("messages", [])) // 4
+                return {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": server.config.completion_tokens,
+                    "total_tokens": prompt_tokens + server.config.completion_tokens,
+                }
+
+            def _complete(self, body):
+                time.sleep(self._first_token_latency(body) + server.config.completion_tokens / server.config.tokens_per_second)
+                self._send_json(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": " ".join(self._words())},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": self._usage(body),
+                })
+
+            def _stream(self, body):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                time.sleep(self._first_token_latency(body))
+                delay = 1.0 / server.config.tokens_per_second
+                for word in self._words():
+                    self._send_event({"delta": {"role": "assistant", "content": word + " "}, "finish_reason": None}, body)
+                    time.sleep(delay)
+                self._send_event({"delta": {}, "finish_reason": "stop"}, body, {"x_groq": {"usage": self._usage(body)}})
+                self._send_chunk(b"data: [DONE]\n\n")
+                self._send_chunk(b"")
+
+            def _send_event(self, choice, body, extra=None):
+                event = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, **choice}],
+                    **(extra or {}),
+                }
+                self._send_chunk(f"data: {json.dumps(event)}\n\n".encode())
+
+            def _send_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def parse_model_latency(values: List[str]) -> Dict[str, float]:
+    """Turn repeated MODEL=SECONDS arguments into a latency map."""
+    latencies = {}
+    for value in values:
+        model, _, seconds = value.rpartition("=")
+        latencies[model] = float(seconds)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Groq chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SECONDS",
+                        help="first-token latency for one model id (repeatable)")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = FakeGroqConfig(
+        first_token_latency=args.first_token_latency,
+        model_first_token_latency=parse_model_latency(args.model_latency),
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+    )
+    server = FakeGroqServer(config, host=args.host, port=args.port).start()
+    print(f"Fake Groq listening on {server.base_url} (set GROQ_BASE_URL to this)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
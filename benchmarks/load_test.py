@@ -0,0 +1,281 @@
+"""
+Load test and latency benchmark for the Science Explorer Streamlit app.
+
+Starts a local fake Groq server, points the app at it and drives N simulated
+sessions through the real behavioral.py script with Streamlit's AppTest:
+first load, a suggestion click, free-text turns, an idle rerun, a mode switch
+and Start Over. Reports p50/p95/p99 turn latency, time to first token, script
+rerun time and memory per session, and writes the results as JSON.
+
+Example:
+    python benchmarks/load_test.py --sessions 25 --concurrency 25 --output bench.json
+    python benchmarks/load_test.py --baseline bench.json
+
+AppTest can only run one script at a time per process, so concurrent sessions
+run in a pool of worker processes that all talk to the same fake server. App
+level caches and the request scheduler are therefore shared per worker, as
+they would be per Streamlit server process. AppTest also doesn't reset button
+triggers across st.rerun(), so sidebar buttons are simulated by applying their
+session-state changes directly, through start_over() for Start Over.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import multiprocessing
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_groq import FakeGroqConfig, FakeGroqServer, parse_model_latency  # noqa: E402
+from metrics import percentile  # noqa: E402
+
+APP_PATH = os.path.join(REPO_ROOT, "behavioral.py")
+
+KID_QUESTIONS = [
+    "why do plants need sun",
+    "Why do plants need sunlight?",
+    "how do magnets work",
+    "what makes a rainbow",
+    "why does ice melt",
+    "how do bubbles form?",
+    "can I grow beans in the dark",
+    "what materials do I need?",
+]
+PARENT_QUESTIONS = [
+    "How much time should we plan for the project?",
+    "how do I help without doing the work",
+    "What makes a good display board?",
+    "what are safe experiments for 3rd graders",
+]
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+class Recorder:
+    """Thread-safe collection of timings in milliseconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: List[str] = []
+
+    def add(self, name: str, seconds: Optional[float]):
+        if seconds is None:
+            return
+        with self._lock:
+            self.samples.setdefault(name, []).append(seconds * 1000)
+
+    def error(self, message: str):
+        with self._lock:
+            self.errors.append(message)
+
+
+def timed_run(app, recorder: Recorder, name: str):
+    start = time.perf_counter()
+    app.run()
+    recorder.add(name, time.perf_counter() - start)
+    if app.exception:
+        recorder.error(f"{name}: {app.exception[0].message}")
+
+
+def record_turn(app, recorder: Recorder, name: str, run):
+    """Run one model turn and record its latency and time to first token."""
+    start = time.perf_counter()
+    run()
+    recorder.add(name, time.perf_counter() - start)
+    recorder.add("turn", time.perf_counter() - start)
+    if app.exception:
+        recorder.error(f"{name}: {app.exception[0].message}")
+        return
+    message = app.session_state.messages[-1]
+    if message["role"] == "assistant":
+        recorder.add("time_to_first_token", message.get("time_to_first_token"))
+
+
+def run_session(session_index: int, turns: int, recorder: Recorder, seed: int):
+    """Drive one simulated session through the app."""
+    from streamlit.testing.v1 import AppTest
+
+    from behavioral import start_over
+
+    rng = random.Random(seed + session_index)
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+
+    # First paint
+    timed_run(app, recorder, "first_load")
+
+    # Suggestion click, using the label of one of the rendered suggestion buttons
+    suggestion = app.button(key=f"suggestion_{rng.randrange(12)}").label
+    app.session_state.suggestion_clicked = suggestion
+    record_turn(app, recorder, "suggestion_turn", app.run)
+
+    # Free-text turns
+    for _ in range(turns):
+        question = rng.choice(KID_QUESTIONS)
+        record_turn(app, recorder, "free_text_turn", lambda: app.chat_input[0].set_value(question).run())
+
+    # A sidebar interaction that doesn't call the model
+    timed_run(app, recorder, "rerun")
+
+    # Mode switch, as the Parent Mode button does it
+    app.session_state.is_kid_mode = False
+    app.session_state.bot.switch_mode()
+    timed_run(app, recorder, "mode_switch")
+    question = rng.choice(PARENT_QUESTIONS)
+    record_turn(app, recorder, "free_text_turn", lambda: app.chat_input[0].set_value(question).run())
+
+    # Start Over, through the same function as the sidebar button
+    start_over(app.session_state)
+    timed_run(app, recorder, "start_over")
+    return app
+
+
+def run_session_worker(session_index: int, turns: int, seed: int):
+    """Process-pool entry point: run one session and return its samples and errors."""
+    recorder = Recorder()
+    try:
+        run_session(session_index, turns, recorder, seed)
+    except Exception as e:
+        recorder.error(f"session failed: {e!r}")
+    return recorder.samples, recorder.errors
+
+
+def measure_session_memory(sessions: int, turns: int, seed: int) -> Dict[str, float]:
+    """Traced Python memory retained per session, measured on a separate sequential pass."""
+    recorder = Recorder()
+    # Warm up imports and process-wide resources so they aren't counted per session
+    run_session(-1, turns, recorder, seed)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    apps = [run_session(i, turns, recorder, seed) for i in range(sessions)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del apps
+    return {
+        "sessions": sessions,
+        "retained_kb_per_session": (current - baseline) / 1024 / sessions,
+        "peak_kb": peak / 1024,
+    }
+
+
+def compare(results: Dict, baseline: Dict):
+    """Print percentage changes against a previous results file."""
+    print("\nChange vs baseline (negative is faster):")
+    for name, stats in results["latency_ms"].items():
+        before = baseline.get("latency_ms", {}).get(name)
+        if not before:
+            continue
+        for key in ("p50", "p95", "p99"):
+            if stats.get(key) and before.get(key):
+                change = 100 * (stats[key] - before[key]) / before[key]
+                print(f"  {name:<20} {key}: {before[key]:8.1f} -> {stats[key]:8.1f} ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test behavioral.py against a fake Groq server.")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=3, help="free-text turns per session before the mode switch")
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SECONDS",
+                        help="first-token latency for one model id (repeatable); combine with SCIENCE_BOT_MODELS")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=float, default=6000, help="app scheduler quota")
+    parser.add_argument("--memory-sessions", type=int, default=3, help="sessions in the memory pass (0 skips it)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    args = parser.parse_args()
+
+    config = FakeGroqConfig(
+        first_token_latency=args.first_token_latency,
+        model_first_token_latency=parse_model_latency(args.model_latency),
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server = FakeGroqServer(config).start()
+    os.environ["GROQ_BASE_URL"] = server.base_url
+    os.environ.setdefault("GROQ_API_KEY", "fake-key")
+    os.environ["SCIENCE_BOT_REQUESTS_PER_MINUTE"] = str(args.requests_per_minute)
+    os.environ["SCIENCE_BOT_MAX_CONCURRENT"] = str(max(args.concurrency, 1))
+    os.environ.pop("SCIENCE_BOT_CACHE_PATH", None)
+    # Sessions and metrics are still written, but to scratch files rather than the
+    # app's defaults in the working directory, and no pre-generated answers are read
+    scratch = tempfile.TemporaryDirectory()
+    os.environ["SCIENCE_BOT_SESSION_DB"] = os.path.join(scratch.name, "sessions.db")
+    os.environ["SCIENCE_BOT_METRICS_PATH"] = os.path.join(scratch.name, "metrics.jsonl")
+    os.environ["SCIENCE_BOT_SUGGESTION_ANSWERS"] = os.path.join(scratch.name, "suggestion_answers.json")
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    # Spawned workers inherit the environment set above
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.concurrency, mp_context=context) as pool:
+        futures = [pool.submit(run_session_worker, i, args.turns, args.seed) for i in range(args.sessions)]
+        for future in futures:
+            samples, errors = future.result()
+            for name, values in samples.items():
+                recorder.samples.setdefault(name, []).extend(values)
+            recorder.errors.extend(errors)
+    wall_seconds = time.perf_counter() - start
+
+    results = {
+        "config": vars(args),
+        "wall_seconds": wall_seconds,
+        "latency_ms": {name: summarize(values) for name, values in sorted(recorder.samples.items())},
+        "server": server.stats(),
+        "errors": recorder.errors,
+    }
+    if args.memory_sessions > 0:
+        results["memory"] = measure_session_memory(args.memory_sessions, args.turns, args.seed)
+    server.stop()
+    scratch.cleanup()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{args.sessions} sessions in {wall_seconds:.1f}s, {results['server']['requests']} model requests")
+    for name, stats in results["latency_ms"].items():
+        print(f"  {name:<20} p50 {stats['p50']:8.1f}  p95 {stats['p95']:8.1f}  p99 {stats['p99']:8.1f} ms  (n={stats['count']})")
+    if "memory" in results:
+        print(f"  memory per session  {results['memory']['retained_kb_per_session']:.0f} KB")
+    if recorder.errors:
+        print(f"  {len(recorder.errors)} errors, first: {recorder.errors[0]}")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    # Streamlit's script runner replaces __main__ in the workers, so run from
+    # the module imported by name for the worker functions to unpickle there
+    import load_test
+
+    load_test.main()
@@ -0,0 +1,147 @@
+"""
+Cold-start benchmark for the Science Explorer Streamlit app.
+
+Each run is a fresh Python process, so nothing is already imported or cached.
+The child process measures, in order:
+- streamlit_import_ms: importing streamlit itself, which the app can't avoid,
+- app_import_ms: importing the rest of behavioral.py's top-level imports,
+  read from the script so the same benchmark works before and after changes
+  to them,
+- first_paint_ms: the first full script run with Streamlit's AppTest, up to
+  the welcome message and chat input,
+- first_turn_ms: the first free-text turn against a local fake Groq server,
+  including anything loaded lazily on the first model call.
+cold_start_ms is the sum of the first three. Whether agno was loaded by the
+time of first paint is reported too.
+
+Example:
+    python benchmarks/startup.py --runs 10 --output startup.json
+    python benchmarks/startup.py --baseline startup.json
+"""
+
+import argparse
+import ast
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "behavioral.py")
+
+TIMINGS = ("streamlit_import_ms", "app_import_ms", "first_paint_ms", "cold_start_ms", "first_turn_ms")
+
+
+def top_level_imports(path: str) -> List[str]:
+    """Modules imported unconditionally at the top level of a script, in order."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return modules
+
+
+def measure_once() -> Dict[str, object]:
+    """Child-process entry point: time one cold start and first turn."""
+    sys.path.insert(0, REPO_ROOT)
+    start = time.perf_counter()
+    import streamlit  # noqa: F401
+
+    streamlit_imported = time.perf_counter()
+    for module in top_level_imports(APP_PATH):
+        importlib.import_module(module)
+    app_imported = time.perf_counter()
+
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    paint_started = time.perf_counter()
+    app.run()
+    painted = time.perf_counter()
+    agno_loaded = "agno.agent" in sys.modules
+
+    app.chat_input[0].set_value("why do plants need sunlight").run()
+    answered = time.perf_counter()
+
+    return {
+        "streamlit_import_ms": (streamlit_imported - start) * 1000,
+        "app_import_ms": (app_imported - streamlit_imported) * 1000,
+        # AppTest setup isn't part of a real server's first paint
+        "first_paint_ms": (painted - paint_started) * 1000,
+        "cold_start_ms": (app_imported - start + painted - paint_started) * 1000,
+        "first_turn_ms": (answered - painted) * 1000,
+        "agno_loaded_at_first_paint": agno_loaded,
+        "errors": [element.message for element in app.exception],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import and first-paint time of behavioral.py.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to measure")
+    parser.add_argument("--first-token-latency", type=float, default=0.05)
+    parser.add_argument("--output", default="startup_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_once()))
+        return
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from fake_groq import FakeGroqConfig, FakeGroqServer
+    from load_test import compare, summarize
+
+    server = FakeGroqServer(FakeGroqConfig(first_token_latency=args.first_token_latency)).start()
+    runs = []
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(
+            os.environ,
+            GROQ_BASE_URL=server.base_url,
+            GROQ_API_KEY=os.environ.get("GROQ_API_KEY", "fake-key"),
+            SCIENCE_BOT_SESSION_DB="",
+            SCIENCE_BOT_METRICS_PATH="",
+            SCIENCE_BOT_PREFETCH_TOP_K="0",
+            SCIENCE_BOT_SUGGESTION_ANSWERS=os.path.join(scratch, "suggestion_answers.json"),
+        )
+        env.pop("SCIENCE_BOT_CACHE_PATH", None)
+        for _ in range(args.runs):
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"],
+                env=env, cwd=scratch, capture_output=True, text=True, check=True,
+            )
+            runs.append(json.loads(child.stdout.strip().splitlines()[-1]))
+    server.stop()
+
+    results = {
+        "config": vars(args),
+        "latency_ms": {name: summarize([run[name] for run in runs]) for name in TIMINGS},
+        "agno_loaded_at_first_paint": sum(run["agno_loaded_at_first_paint"] for run in runs),
+        "errors": [error for run in runs for error in run["errors"]],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{args.runs} cold starts")
+    for name, stats in results["latency_ms"].items():
+        print(f"  {name:<20} p50 {stats['p50']:8.1f}  p95 {stats['p95']:8.1f}  max {stats['max']:8.1f} ms")
+    print(f"  agno loaded at first paint in {results['agno_loaded_at_first_paint']} of {args.runs} runs")
+    if results["errors"]:
+        print(f"  {len(results['errors'])} errors, first: {results['errors'][0]}")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Windowed rendering support for long chat transcripts.
+
+Only the most recent messages are drawn as individual chat bubbles. Older
+messages are grouped into fixed-size pages counted from the start of the
+conversation, so a page never changes once it is full. Each page is compiled
+into a single markdown block the first time it is shown and reused on every
+later rerun. Large identical blocks are also deduplicated by Streamlit's
+forward-message cache, so the browser doesn't download them again.
+
+The in-memory message list may hold only the tail of the conversation, with
+earlier messages fetched through a loader when their page is shown.
+"""
+
+import textwrap
+from typing import Callable, Dict, Optional
+
+ROLE_LABELS = {"user": "🧑 **You**", "assistant": "🔬 **Science Explorer**"}
+
+
+def message_markdown(message: Dict[str, str]) -> str:
+    """Markdown body of one message, dedented the way st.markdown does it."""
+    return textwrap.dedent(message["content"]).strip()
+
+
+class TranscriptPager:
+    def __init__(
+        self,
+        recent_messages: int = 12,
+        page_size: int = 20,
+        offset: int = 0,
+        loader: Optional[Callable[[int, int], list]] = None,
+    ):
+        # Messages always drawn as chat bubbles (up to page_size - 1 more until a page fills)
+        self.recent_messages = recent_messages
+        self.page_size = page_size
+        # Number of earlier messages not held in the message list
+        self.offset = offset
+        # Fetches messages [start, end) of the conversation that precede the offset
+        self.loader = loader
+        # Page index -> compiled markdown
+        self._pages: Dict[int, str] = {}
+        # The message list the pages were compiled from
+        self._source: Optional[list] = None
+
+    def tail_start(self, total: int) -> int:
+        """Index of the first message outside the archived pages of a conversation of total messages."""
+        return max(0, total - self.recent_messages) // self.page_size * self.page_size
+
+    def archived_pages(self, messages: list) -> int:
+        """Number of full pages that have scrolled out of the recent window."""
+        return self.tail_start(self.offset + len(messages)) // self.page_size
+
+    def recent(self, messages: list) -> list:
+        """Messages after the last archived page."""
+        return messages[max(0, self.archived_pages(messages) * self.page_size - self.offset):]
+
+    def trim(self, messages: list) -> int:
+        """Drop archived messages from the front of the list, in place, and return how many went.
+
+        Only valid once a loader can fetch them again.
+        """
+        drop = self.archived_pages(messages) * self.page_size - self.offset
+        if drop <= 0 or self.loader is None:
+            return 0
+        del messages[:drop]
+        self.offset += drop
+        return drop
+
+    def page(self, messages: list, index: int) -> str:
+        """Compiled markdown for one archived page, built on first use."""
+        if messages is not self._source or max(self._pages, default=-1) >= self.archived_pages(messages):
+            # A new or truncated conversation
+            self._pages = {}
+            self._source = messages
+        if index not in self._pages:
+            start = index * self.page_size
+            end = start + self.page_size
+            if start >= self.offset:
+                page = messages[start - self.offset:end - self.offset]
+            else:
+                page = self.loader(start, end)
+            self._pages[index] = self._compile(page)
+        return self._pages[index]
+
+    @staticmethod
+    def _compile(page: list) -> str:
+        return "\n\n---\n\n".join(
+            f"{ROLE_LABELS.get(message['role'], message['role'])}\n\n{message_markdown(message)}"
+            for message in page
+        )
@@ -0,0 +1,126 @@
+"""
+Token-budgeted conversation window for the Science Explorer agent.
+
+The most recent turns are sent to the model verbatim. Older turns are folded,
+one at a time, into a running summary that is placed in the system message, so
+prompt size stays bounded however long a session runs.
+"""
+
+import re
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    # Annotations only; estimate_tokens is used at import time by prompts.py, before agno is needed
+    from agno.agent import Agent
+    from agno.memory.agent import AgentRun
+
+# Rough stand-in for a BPE tokenizer: words, numbers and single symbols/emoji
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate how many model tokens a piece of text will use.
+
+    Long words are split by BPE tokenizers, so each word is counted as one
+    token per four characters.
+    """
+    if not text:
+        return 0
+    return sum(max(1, len(piece) // 4) for piece in _TOKEN_PATTERN.findall(text))
+
+
+def run_text(run: "AgentRun") -> Tuple[str, str]:
+    """Return the (user, assistant) text of one run, ignoring replayed history."""
+    user_text = ""
+    assistant_text = ""
+    if run.response is None or not run.response.messages:
+        return user_text, assistant_text
+    for message in run.response.messages:
+        if getattr(message, "from_history", False) or not isinstance(message.content, str):
+            continue
+        if message.role == "user":
+            user_text = message.content
+        elif message.role == "assistant":
+            assistant_text = message.content
+    return user_text, assistant_text
+
+
+def _first_sentence(text: str, max_words: int) -> str:
+    """Condense text to its first sentence, capped at max_words."""
+    text = " ".join(text.split())
+    sentence = _SENTENCE_END.split(text, maxsplit=1)[0]
+    words = sentence.split()
+    if len(words) > max_words:
+        sentence = " ".join(words[:max_words]) + "..."
+    return sentence
+
+
+class ConversationWindow:
+    def __init__(self, max_prompt_tokens: int = 3000, keep_turns: int = 4, max_summary_tokens: int = 400):
+        # Budget for everything sent with a request: system message, summary, history and prompt
+        self.max_prompt_tokens = max_prompt_tokens
+        # Most recent turns to send verbatim when the budget allows
+        self.keep_turns = keep_turns
+        # Oldest summary lines are dropped once the summary grows past this
+        self.max_summary_tokens = max_summary_tokens
+        self.summary_lines: List[str] = []
+        # Number of runs (from the start of memory) already folded into the summary
+        self.folded_runs = 0
+        # Estimated prompt tokens for each turn sent to the model
+        self.prompt_tokens: List[int] = []
+
+    @property
+    def summary(self) -> str:
+        """Running summary of the folded turns."""
+        return "\n".join(self.summary_lines)
+
+    def reset(self):
+        """Forget the summary, e.g. when the conversation is cleared."""
+        self.summary_lines = []
+        self.folded_runs = 0
+        self.prompt_tokens = []
+
+    def prepare(self, agent: "Agent", prompt: str) -> int:
+        """Fit the agent's next request into the token budget.
+
+        Sets how many past runs the agent replays and puts the summary of the
+        rest into its system message. Returns the estimated prompt tokens.
+        """
+        runs = agent.memory.runs if agent.memory is not None else []
+        fixed_tokens = estimate_tokens(agent.description) + estimate_tokens(prompt)
+        fixed_tokens += sum(estimate_tokens(line) for line in (agent.instructions or []))
+
+        # Runs are folded in order and never un-folded, so the window only slides forward
+        keep = min(self.keep_turns, len(runs) - self.folded_runs)
+        while True:
+            self._fold(runs[: len(runs) - keep])
+            history_tokens = sum(estimate_tokens(text) for run in runs[len(runs) - keep :] for text in run_text(run))
+            total = fixed_tokens + estimate_tokens(self.summary) + history_tokens
+            if total <= self.max_prompt_tokens or keep == 0:
+                break
+            keep -= 1
+
+        # agno replays every run for last_n=0, so switch history off instead
+        agent.add_history_to_messages = keep > 0
+        agent.num_history_responses = keep
+        agent.additional_context = (
+            f"Summary of the earlier conversation:\n{self.summary}" if self.summary_lines else None
+        )
+        self.prompt_tokens.append(total)
+        return total
+
+    def _fold(self, runs: List["AgentRun"]):
+        """Summarize runs that have just left the verbatim window."""
+        for run in runs[self.folded_runs :]:
+            user_text, assistant_text = run_text(run)
+            parts = []
+            if user_text:
+                parts.append(f"User asked: {_first_sentence(user_text, 25)}")
+            if assistant_text:
+                parts.append(f"You replied: {_first_sentence(assistant_text, 25)}")
+            if parts:
+                self.summary_lines.append("- " + " / ".join(parts))
+        self.folded_runs = max(self.folded_runs, len(runs))
+        while len(self.summary_lines) > 1 and estimate_tokens(self.summary) > self.max_summary_tokens:
+            self.summary_lines.pop(0)
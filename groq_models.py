@@ -0,0 +1,64 @@
+"""
+agno Groq models that share HTTP clients through a ModelClientPool.
+
+Importing this module loads agno and the groq SDK, so the app only does it
+when a bot makes its first model call.
+
+RoutedGroq additionally spreads streamed calls over several model ids through
+a ModelRouter, for hedging and failover.
+"""
+
+import copy
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from agno.models.groq import Groq
+from agno.models.message import Message
+from groq import AsyncGroq as AsyncGroqClient
+from groq import Groq as GroqClient
+
+from model_pool import ModelClientPool
+from model_router import ModelRouter
+
+
+@dataclass
+class PooledGroq(Groq):
+    """Groq model that borrows its HTTP client from a shared ModelClientPool."""
+
+    pool: Optional[ModelClientPool] = None
+
+    def get_client(self) -> GroqClient:
+        if self.pool is None:
+            return super().get_client()
+        return self.pool.get_client(self)
+
+    def get_async_client(self) -> AsyncGroqClient:
+        if self.pool is None:
+            return super().get_async_client()
+        return self.pool.get_async_client(self)
+
+
+@dataclass
+class RoutedGroq(PooledGroq):
+    """PooledGroq whose async streamed calls go through a ModelRouter.
+
+    The router picks among model ids, so the agent's memory and message
+    handling stay on this one model object. Other calls use `id` directly.
+    """
+
+    router: Optional[ModelRouter] = None
+
+    async def ainvoke_stream(self, messages: List[Message]) -> Any:
+        if self.router is None:
+            async for chunk in super().ainvoke_stream(messages):
+                yield chunk
+            return
+
+        def open_stream(model_id: str):
+            backend = copy.copy(self)
+            backend.id = model_id
+            backend.router = None
+            return backend.ainvoke_stream(messages)
+
+        async for chunk in self.router.stream(open_stream):
+            yield chunk
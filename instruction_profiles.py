@@ -0,0 +1,54 @@
+"""
+Compiled instruction profiles.
+
+A profile's source is a list of instruction lines as written in prompts.py:
+a persona line, "HEADING:" lines each followed by "- " bullets, and closing
+lines. Compiling joins every section into a single line, so the whole profile
+becomes one compact system prompt instead of a bullet per line with agno's
+description and markdown boilerplate around it. Each compiled prompt's token
+count is measured with the conversation window's tokenizer, and a profile
+that outgrows its budget fails at import rather than silently making every
+request more expensive.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+from conversation_window import estimate_tokens
+
+
+class ProfileOverBudget(ValueError):
+    """A compiled profile uses more tokens than its budget allows."""
+
+
+@dataclass(frozen=True)
+class InstructionProfile:
+    name: str
+    mode: str
+    system_prompt: str
+    # Estimated tokens of system_prompt, and the most it may use
+    tokens: int
+    budget: int
+
+
+def compile_instructions(lines: List[str]) -> str:
+    """Join instruction lines into one compact prompt, with one line per section."""
+    compiled: List[str] = []
+    for line in lines:
+        line = " ".join(line.split())
+        if line.startswith("- ") and compiled and compiled[-1].endswith(":"):
+            compiled[-1] += f" {line[2:]}"
+        elif line.startswith("- ") and compiled:
+            compiled[-1] += f"; {line[2:]}"
+        else:
+            compiled.append(line)
+    return "\n".join(compiled)
+
+
+def build_profile(name: str, mode: str, lines: List[str], budget: int) -> InstructionProfile:
+    """Compile and measure a profile, raising ProfileOverBudget if it doesn't fit."""
+    system_prompt = compile_instructions(lines)
+    tokens = estimate_tokens(system_prompt)
+    if tokens > budget:
+        raise ProfileOverBudget(f"{name} {mode} instructions use ~{tokens} tokens, over the budget of {budget}")
+    return InstructionProfile(name=name, mode=mode, system_prompt=system_prompt, tokens=tokens, budget=budget)
@@ -0,0 +1,98 @@
+"""
+Per-turn performance metrics for the Science Explorer app.
+
+Events (script reruns and model turns) are appended to a rotating JSONL log
+and folded into rolling per-mode windows, from which percentiles are computed
+for the admin panel.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Any, Deque, Dict, List, Optional
+
+# Numeric event fields that get rolling percentiles
+TRACKED_FIELDS = (
+    "rerun_ms",
+    "history_render_ms",
+    "model_ms",
+    "ttft_ms",
+    "prompt_tokens",
+    "prompt_tokens_estimate",
+    "completion_tokens",
+    "prescreen_us",
+)
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Linear-interpolated percentile, or None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class MetricsRecorder:
+    def __init__(
+        self, path: Optional[str] = None, window: int = 500, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 5
+    ):
+        self.window = window
+        self._lock = threading.Lock()
+        # (mode, field) -> most recent values
+        self._values: Dict[tuple, Deque[float]] = {}
+        # mode -> most recent turns' cache outcomes (None for a model call)
+        self._cache_outcomes: Dict[str, Deque[Optional[str]]] = {}
+        # mode -> most recent turns' pre-screen categories (None if the prompt went on)
+        self._prescreen_outcomes: Dict[str, Deque[Optional[str]]] = {}
+        self._logger: Optional[logging.Logger] = None
+        if path:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger = logging.getLogger(f"science_bot.metrics.{id(self)}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(handler)
+
+    def record(self, event: str, mode: str, **fields: Any):
+        """Log one event and add its numeric fields to the rolling windows."""
+        entry = {"ts": round(time.time(), 3), "event": event, "mode": mode, **fields}
+        if self._logger is not None:
+            self._logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+        with self._lock:
+            for field in TRACKED_FIELDS:
+                value = fields.get(field)
+                if isinstance(value, (int, float)):
+                    self._values.setdefault((mode, field), deque(maxlen=self.window)).append(value)
+            if event == "turn":
+                self._cache_outcomes.setdefault(mode, deque(maxlen=self.window)).append(fields.get("cache"))
+                self._prescreen_outcomes.setdefault(mode, deque(maxlen=self.window)).append(fields.get("prescreen"))
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Rolling p50/p95/p99 per mode and field, plus cache hit and pre-screen rates per mode."""
+        with self._lock:
+            values = {key: list(window) for key, window in self._values.items()}
+            outcomes = {mode: list(window) for mode, window in self._cache_outcomes.items()}
+            screened = {mode: list(window) for mode, window in self._prescreen_outcomes.items()}
+        rows = []
+        for (mode, field), samples in sorted(values.items()):
+            rows.append({
+                "mode": mode,
+                "metric": field,
+                "count": len(samples),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+            })
+        for mode, turns in sorted(outcomes.items()):
+            hits = sum(1 for outcome in turns if outcome)
+            rows.append({"mode": mode, "metric": "cache_hit_rate", "count": len(turns), "p50": hits / len(turns)})
+        for mode, turns in sorted(screened.items()):
+            hits = sum(1 for outcome in turns if outcome)
+            rows.append({"mode": mode, "metric": "prescreen_rate", "count": len(turns), "p50": hits / len(turns)})
+        return rows
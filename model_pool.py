@@ -0,0 +1,57 @@
+"""
+Process-wide pool of Groq HTTP clients.
+
+Every session gets its own lightweight agno model object, but the underlying
+Groq client (and its connection pool / TLS sessions) is created once per
+process and shared, so new sessions, mode switches and resets don't pay for
+connection setup.
+
+The groq SDK is only imported when the first client is created, so the pool
+can be set up during page load without the import cost. The agno model
+classes that borrow clients from it live in groq_models.py.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from groq import AsyncGroq as AsyncGroqClient
+    from groq import Groq as GroqClient
+
+
+class ModelClientPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client: Optional["GroqClient"] = None
+        self._async_client: Optional["AsyncGroqClient"] = None
+
+    def get_client(self, model: Any) -> "GroqClient":
+        """Return the shared client, creating it from the first model's settings."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from groq import Groq as GroqClient
+
+                    self._client = GroqClient(**model._get_client_params())
+        return self._client
+
+    def get_async_client(self, model: Any) -> "AsyncGroqClient":
+        """Return the shared async client.
+
+        Its connections belong to the event loop that first uses them, so it
+        must only be used from the app's single background loop. Retries are
+        left to the RequestScheduler, which backs off across all sessions.
+        """
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    import httpx
+                    from groq import AsyncGroq as AsyncGroqClient
+
+                    self._async_client = AsyncGroqClient(
+                        http_client=httpx.AsyncClient(
+                            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+                        ),
+                        **{**model._get_client_params(), "max_retries": 0},
+                    )
+        return self._async_client
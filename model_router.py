@@ -0,0 +1,310 @@
+"""
+Hedged, failover-aware routing of streamed model calls across backends.
+
+Backends are tried in order. If the chosen backend hasn't produced its first
+chunk by a deadline taken from its own time-to-first-chunk percentile, a
+hedged request goes to the next backend and whichever answers first wins; the
+other is cancelled. A hedge goes to a backend not yet tried if there is one,
+or else repeats the request on the same backend, and can be made to spend
+from the caller's rate quota. A backend that fails before
+answering is replaced by the next one straight away. Failing, or answering
+after the deadline, counts against a backend; one that keeps doing so is
+skipped by a circuit breaker until a cool-down has passed, after which one
+trial request decides whether it is used again. Rate-limit errors say nothing
+about a backend's health and are left to the scheduler's backoff, and the last
+working backend is never opened.
+
+The router only sees callables that open an async stream for a backend name,
+so it works the same with real model clients and with local stubs.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, TypeVar
+
+from metrics import percentile
+from scheduler import is_rate_limited
+
+T = TypeVar("T")
+
+
+class NoBackendAvailable(Exception):
+    """Every backend's circuit is open."""
+
+    # Circuits half-open after a cool-down, so the scheduler retries with backoff
+    retryable = True
+
+
+class _Backend:
+    """Latency samples and circuit-breaker state for one backend."""
+
+    def __init__(self, name: str, window: int):
+        self.name = name
+        # Seconds to first chunk; attempts beaten by a hedge add their elapsed time as a lower bound
+        self.first_chunk_seconds: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.wins = 0
+        self.failures = 0
+        self.rate_limited = 0
+        # Attempts that answered after their hedge deadline, or were beaten by a hedge
+        self.slow = 0
+        self.hedges = 0
+        # Failures and slow attempts since the last prompt answer
+        self.consecutive_failures = 0
+        # When the circuit opened; None while closed
+        self.opened_at: Optional[float] = None
+        # A half-open trial request is in flight
+        self.probing = False
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        backends: List[str],
+        hedge_percentile: float = 95,
+        initial_hedge_seconds: float = 2.0,
+        min_hedge_seconds: float = 0.5,
+        max_hedge_seconds: float = 3.0,
+        min_samples: int = 20,
+        max_hedge_ratio: float = 0.2,
+        failure_threshold: int = 3,
+        reset_seconds: float = 30.0,
+        window: int = 200,
+        admit_hedge: Optional[Callable[[], bool]] = None,
+    ):
+        if not backends:
+            raise ValueError("ModelRouter needs at least one backend")
+        # Percentile of a backend's time to first chunk after which a hedge is sent
+        self.hedge_percentile = hedge_percentile
+        # Hedge deadline used until a backend has min_samples samples
+        self.initial_hedge_seconds = initial_hedge_seconds
+        # The deadline never exceeds max_hedge_seconds, so a uniformly slow backend still counts as slow
+        self.min_hedge_seconds = min_hedge_seconds
+        self.max_hedge_seconds = max_hedge_seconds
+        self.min_samples = min_samples
+        # Hedges are capped at this fraction of requests, so a slow provider doesn't double the load
+        self.max_hedge_ratio = max_hedge_ratio
+        # Consecutive failures that open a backend's circuit, and how long it stays open
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        # Called on the loop before each hedge, e.g. to take a rate-limit token; False skips the hedge
+        self.admit_hedge = admit_hedge
+        self.requests = 0
+        self.hedges = 0
+        self.failovers = 0
+        self._lock = threading.Lock()
+        self._backends = [_Backend(name, window) for name in backends]
+
+    async def stream(self, open_stream: Callable[[str], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Yield the chunks of the first backend to produce one.
+
+        Raises the last backend error if every candidate failed before
+        answering, or NoBackendAvailable if every circuit is open.
+        """
+        candidates = self._candidates()
+        if not candidates:
+            raise NoBackendAvailable("every model backend is failing; retry shortly")
+        with self._lock:
+            self.requests += 1
+        loop = asyncio.get_running_loop()
+        # first-chunk task -> (backend, chunk iterator, started at, hedge deadline in seconds)
+        attempts: Dict[asyncio.Task, tuple] = {}
+        tried = 0
+        last_error: Optional[BaseException] = None
+        winner = None
+
+        def launch(hedge: bool = False) -> float:
+            """Start an attempt on the next candidate and return its hedge deadline."""
+            nonlocal tried
+            # With a single backend, a hedge is a duplicate request to it
+            backend = candidates[tried % len(candidates)]
+            tried += 1
+            deadline = self.hedge_delay(backend.name)
+            iterator = open_stream(backend.name).__aiter__()
+            task = asyncio.ensure_future(iterator.__anext__())
+            attempts[task] = (backend, iterator, loop.time(), deadline)
+            with self._lock:
+                backend.requests += 1
+                if hedge:
+                    self.hedges += 1
+                    backend.hedges += 1
+                if self._state(backend) == "half-open":
+                    backend.probing = True
+            return deadline
+
+        try:
+            hedge_at = loop.time() + launch()
+            while True:
+                timeout = max(0.0, hedge_at - loop.time()) if hedge_at is not None else None
+                done, _ = await asyncio.wait(attempts, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Deadline passed with no first chunk
+                    hedge_at = None
+                    if self._may_hedge():
+                        launch(hedge=True)
+                    continue
+
+                for task in done:
+                    backend, iterator, started_at, deadline = attempts.pop(task)
+                    error = task.exception()
+                    if error is None or isinstance(error, StopAsyncIteration):
+                        winner = (backend, iterator, started_at, deadline, None if error else task.result())
+                        break
+                    last_error = error
+                    if is_rate_limited(error):
+                        self._record_rate_limited(backend)
+                    else:
+                        self._record_failure(backend)
+                if winner is not None:
+                    break
+                if not attempts:
+                    if tried >= len(candidates):
+                        raise last_error
+                    # Fail over to the next backend, with its own hedge deadline
+                    with self._lock:
+                        self.failovers += 1
+                    hedge_at = loop.time() + launch()
+        finally:
+            await self._cancel_losers(attempts, loop, lost=winner is not None)
+
+        backend, iterator, started_at, deadline, first_chunk = winner
+        self._record_success(backend, loop.time() - started_at, deadline)
+        if first_chunk is None:
+            # The stream ended without any chunks
+            return
+        try:
+            yield first_chunk
+            async for chunk in iterator:
+                yield chunk
+        except Exception as e:
+            if is_rate_limited(e):
+                self._record_rate_limited(backend)
+            else:
+                self._record_failure(backend)
+            raise
+        finally:
+            await iterator.aclose()
+
+    def hedge_delay(self, name: str) -> float:
+        """Seconds to wait for a backend's first chunk before hedging."""
+        backend = self._backend(name)
+        with self._lock:
+            samples = list(backend.first_chunk_seconds)
+        if len(samples) < self.min_samples:
+            return self.initial_hedge_seconds
+        delay = percentile(samples, self.hedge_percentile)
+        return min(self.max_hedge_seconds, max(self.min_hedge_seconds, delay))
+
+    def stats(self) -> Dict[str, object]:
+        """Router counters plus per-backend latency percentiles and circuit state."""
+        backends = {}
+        for backend in self._backends:
+            with self._lock:
+                samples = list(backend.first_chunk_seconds)
+                state = self._state(backend)
+                counters = {
+                    "requests": backend.requests,
+                    "wins": backend.wins,
+                    "failures": backend.failures,
+                    "rate_limited": backend.rate_limited,
+                    "slow": backend.slow,
+                    "hedges": backend.hedges,
+                }
+            backends[backend.name] = {
+                **counters,
+                "circuit": state,
+                "p50_first_chunk_ms": 1000 * percentile(samples, 50) if samples else None,
+                "p95_first_chunk_ms": 1000 * percentile(samples, 95) if samples else None,
+                "hedge_after_ms": 1000 * self.hedge_delay(backend.name),
+            }
+        with self._lock:
+            return {"requests": self.requests, "hedges": self.hedges, "failovers": self.failovers, "backends": backends}
+
+    def _backend(self, name: str) -> _Backend:
+        return next(backend for backend in self._backends if backend.name == name)
+
+    def _state(self, backend: _Backend) -> str:
+        """closed, open or half-open. Caller must hold the lock."""
+        if backend.opened_at is None:
+            return "closed"
+        if time.monotonic() - backend.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def _candidates(self) -> List[_Backend]:
+        """Backends to try, in order; a half-open backend is let through for one trial at a time."""
+        candidates = []
+        with self._lock:
+            for backend in self._backends:
+                state = self._state(backend)
+                if state == "closed":
+                    candidates.append(backend)
+                elif state == "half-open" and not backend.probing:
+                    candidates.append(backend)
+        return candidates
+
+    def _may_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges >= self.max_hedge_ratio * self.requests:
+                return False
+        return self.admit_hedge is None or self.admit_hedge()
+
+    def _record_success(self, backend: _Backend, first_chunk_seconds: float, deadline: float):
+        with self._lock:
+            backend.first_chunk_seconds.append(first_chunk_seconds)
+            backend.wins += 1
+        if first_chunk_seconds > deadline:
+            self._record_failure(backend, slow=True)
+            return
+        with self._lock:
+            backend.consecutive_failures = 0
+            backend.opened_at = None
+            backend.probing = False
+
+    def _record_failure(self, backend: _Backend, slow: bool = False):
+        with self._lock:
+            if slow:
+                backend.slow += 1
+            else:
+                backend.failures += 1
+            backend.consecutive_failures += 1
+            trips = backend.probing or backend.consecutive_failures >= self.failure_threshold
+            if trips:
+                # A struggling backend beats none at all when nothing else is working
+                trips = any(self._state(other) == "closed" for other in self._backends if other is not backend)
+            if trips:
+                backend.opened_at = time.monotonic()
+            backend.probing = False
+
+    def _record_rate_limited(self, backend: _Backend):
+        """Count a rate-limit error without holding it against the backend's health."""
+        with self._lock:
+            backend.rate_limited += 1
+            # The trial didn't decide anything; let the next request try again
+            backend.probing = False
+
+    async def _cancel_losers(self, attempts: Dict[asyncio.Task, tuple], loop: asyncio.AbstractEventLoop, lost: bool):
+        """Cancel attempts still waiting for their first chunk and close their streams.
+
+        lost is set when another attempt answered first, which counts against
+        the cancelled backends; otherwise the caller went away.
+        """
+        for task, (backend, _, started_at, _) in attempts.items():
+            task.cancel()
+            if lost:
+                # Elapsed time is a lower bound on this backend's time to first chunk;
+                # a caller that gave up early says nothing about it
+                with self._lock:
+                    backend.first_chunk_seconds.append(loop.time() - started_at)
+                self._record_failure(backend, slow=True)
+            else:
+                with self._lock:
+                    # An abandoned trial neither closes nor re-opens the circuit
+                    backend.probing = False
+        if attempts:
+            await asyncio.gather(*attempts, return_exceptions=True)
+        for _, iterator, _, _ in attempts.values():
+            await iterator.aclose()
+        attempts.clear()
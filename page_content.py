@@ -0,0 +1,209 @@
+"""
+Static page content for the Science Explorer app, prepared once per process.
+
+Streamlit re-executes behavioral.py on every rerun, but imported modules stay
+loaded. Everything here is built on first import and then only referenced:
+the minified stylesheet, each mode's markdown and HTML, and the sidebar
+images. The images are bundled in assets/ rather than fetched from a
+remote host, so first paint doesn't wait on a third-party server.
+"""
+
+import os
+import re
+from dataclasses import dataclass
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# Custom CSS for kid-friendly aesthetics
+_CSS = """\
+.main {
+    background-color: #f8f9fa;
+}
+.stApp {
+    background-image: linear-gradient(to bottom right, #c9f5ff, #e8f8ff);
+}
+.css-18e3th9 {
+    padding-top: 2rem;
+}
+.sidebar-content {
+    padding: 1rem;
+    background-color: rgba(255, 255, 255, 0.8);
+    border-radius: 1rem;
+    border: 3px solid #4dabf7;
+}
+h1, h2, h3 {
+    color: #1e88e5;
+    font-family: 'Comic Sans MS', cursive, sans-serif;
+}
+.stButton button {
+    background-color: #4dabf7;
+    color: white;
+    font-weight: bold;
+    border: none;
+    padding: 0.5rem 1rem;
+    border-radius: 0.8rem;
+    transition: all 0.3s ease;
+    font-family: 'Comic Sans MS', cursive, sans-serif;
+}
+.stButton button:hover {
+    background-color: #3a8bd8;
+    transform: translateY(-2px);
+}
+.kid-mode {
+    background-color: #ffeb3b;
+    padding: 10px;
+    border-radius: 10px;
+    border: 3px dashed #ff9800;
+    margin-bottom: 15px;
+}
+.parent-mode {
+    background-color: #bbdefb;
+    padding: 10px;
+    border-radius: 10px;
+    border: 3px dashed #1976d2;
+    margin-bottom: 15px;
+}
+footer {
+    font-size: 0.8rem;
+    text-align: center;
+    color: #666;
+    margin-top: 2rem;
+}"""
+
+
+def minify_css(css: str) -> str:
+    """Drop comments, line breaks and the spaces around punctuation."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def read_asset(name: str) -> bytes:
+    """Contents of a file bundled in assets/."""
+    with open(os.path.join(ASSETS_DIR, name), "rb") as f:
+        return f.read()
+
+
+STYLE_HTML = f"<style>{minify_css(_CSS)}</style>"
+
+FOOTER_HTML = """\
+<footer>
+    Hackett Elementary School Science Fair
+</footer>"""
+
+
+@dataclass(frozen=True)
+class PageContent:
+    title: str
+    intro: str
+    banner_html: str
+    # PNG bytes of the sidebar image
+    image: bytes
+    sidebar_header: str
+    sidebar_markdown: str
+    reminder_markdown: str
+    welcome: str
+    chat_placeholder: str
+    tagline: str
+
+
+KID_PAGE = PageContent(
+    title="🔬 Science Explorer Bot for Kids! 🚀",
+    intro="""\
+> Hey there, science explorer! I'm Professor Atom and I'm here to help you create an AMAZING science fair project! Let's discover cool stuff together! 🌈✨""",
+    banner_html="""\
+<div class='kid-mode'>
+<h3>👦👧 KID MODE ACTIVE! 👦👧</h3>
+<p>I'll help you explore science and find a great project!</p>
+</div>""",
+    image=read_asset("test-tube.png"),
+    sidebar_header="Meet Professor Atom! 🧪",
+    sidebar_markdown="""\
+Hi there, young scientist! 👋
+
+I'm here to help you:
+- 🔎 Find a cool science question
+- 🤔 Make a guess (that's a hypothesis!)
+- 🧪 Test your ideas with experiments
+- 📝 Record what happens
+- 🎯 Figure out what it all means
+
+I won't give you the answers - that's YOUR job as a scientist! But I'll help you discover them yourself! 🚀""",
+    reminder_markdown="""\
+### 🔍 Scientific Method
+1. Ask a question ❓
+2. Make a guess (hypothesis) 🤔
+3. Test with an experiment 🧪
+4. Record what happens 📝
+5. Share what you learned! 🌟""",
+    welcome="""\
+# Hello, future scientist! 👋🔬
+
+I'm **Professor Atom**, and I'm SUPER excited to help you with your Hackett Elementary Science Fair project! 🚀
+
+Science is like being a detective who solves nature's mysteries! ✨ We're going to:
+
+1. Ask awesome questions ❓
+2. Make cool guesses 🤔
+3. Test our ideas with experiments 🧪
+4. Write down what happens 📝
+5. Figure out what it all means! 🧠
+
+What kind of science stuff are you interested in? Plants? 🌱 Animals? 🐾 Weather? 🌦️ Space? 🪐 Tell me what you're curious about, and we'll start exploring together!
+
+Remember - real scientists don't know all the answers... they just know how to find them! 🔍""",
+    chat_placeholder="What's your science question? 🔍",
+    tagline="*Where curious kids become awesome scientists!* 🔬✨",
+)
+
+PARENT_PAGE = PageContent(
+    title="🔬 Science Fair Parent Support",
+    intro="""\
+> Welcome to the parent guide for Hackett Elementary School science fair projects. This resource will help you support your child's learning journey while letting them take ownership of their project.""",
+    banner_html="""\
+<div class='parent-mode'>
+<h3>👨‍👩‍👧‍👦 PARENT MODE ACTIVE 👨‍👩‍👧‍👦</h3>
+<p>Guidance for supporting your child's science fair journey.</p>
+</div>""",
+    image=read_asset("microscope.png"),
+    sidebar_header="Parent Resource Center 📚",
+    sidebar_markdown="""\
+Welcome to the parent support section. Here you'll find:
+
+- 📅 Timeline management tips
+- 🧠 Age-appropriate guidance
+- 🔍 How to ask guiding questions
+- 📊 Documentation strategies
+- 🏆 Science fair preparation help
+
+Our goal is to help you support your child's learning journey while fostering independence and scientific thinking.""",
+    reminder_markdown="""\
+### 📋 Science Fair Checklist
+- Choose age-appropriate topic
+- Guide question formulation  
+- Help gather materials safely
+- Assist with documentation
+- Support independence
+- Practice presentation
+- Prepare display board""",
+    welcome="""\
+# Welcome to the Science Fair Parent Support Center
+
+Thank you for helping your child navigate their science fair journey at Hackett Elementary. My name is Dr. Morgan, and I'm here to provide guidance that helps you support your young scientist while fostering their independence and critical thinking skills.
+
+The elementary school science fair is about:
+- Developing curiosity and scientific thinking 🧠
+- Learning the scientific method through hands-on experience 🔍
+- Building confidence in problem-solving abilities 💪
+- Creating documentation and presentation skills 📊
+
+What aspect of the science fair process would you like guidance on? Are you looking for project ideas, timeline planning, materials assistance, or strategies to support without taking over?""",
+    chat_placeholder="How can I help with your child's science fair project?",
+    tagline="*Supporting the next generation of scientific thinkers* 🔬📚",
+)
+
+
+def get_page_content(is_kid_mode: bool) -> PageContent:
+    """Static content for the given mode."""
+    return KID_PAGE if is_kid_mode else PARENT_PAGE
@@ -0,0 +1,307 @@
+"""
+Speculative prefetch of likely next answers.
+
+After a reply, the next prompt is often predictable: a short follow-up such
+as "What materials do I need?" or a suggestion related to what was just
+discussed. predict_next_prompts() ranks those candidates, and the Prefetcher
+generates answers for the top few in the background. If the user sends one of
+them next, it is served at once.
+
+Speculative answers depend on the conversation, so a session's answers are
+only valid for the conversation state they were generated in. Prefetching is
+strictly lower priority than real requests:
+- it runs on a small pool of its own,
+- it only takes a scheduler slot when no session is waiting and a reserve of
+  slots stays free,
+- each session has a token budget, with an estimated cost reserved for every
+  generation as it is scheduled, and
+- anything still running is cancelled as soon as the conversation moves on.
+
+Hits, cancellations and the tokens spent on answers nobody used are counted,
+so speculation can be tuned or switched off.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from async_runner import BackgroundLoop
+from prescreen import normalize
+from scheduler import RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+FOLLOW_UPS = {
+    "kid": [
+        "What materials do I need?",
+        "How do I start my experiment?",
+        "What should I write down?",
+        "Can you give me another idea?",
+    ],
+    "parent": [
+        "What materials will we need?",
+        "How long will this project take?",
+        "How should we document the results?",
+        "How can my child present this?",
+    ],
+}
+
+_WORD = re.compile(r"[a-z]{4,}")
+
+# Returns the answer to a prompt and the prompt plus completion tokens it used
+Generate = Callable[[str], Awaitable[Tuple[str, int]]]
+
+
+def predict_next_prompts(
+    mode: str, suggestions: List[str], last_exchange: str, asked: Iterable[str], k: int
+) -> List[str]:
+    """Up to k likely next prompts, most likely first.
+
+    Follow-ups from the mode's table alternate with the suggestions that share
+    the most words with the last exchange. Prompts already asked are skipped.
+    """
+    asked_keys = {normalize(prompt) for prompt in asked}
+    follow_ups = [prompt for prompt in FOLLOW_UPS.get(mode, []) if normalize(prompt) not in asked_keys]
+    context_words = set(_WORD.findall(last_exchange.lower()))
+    overlap = {
+        suggestion: len(context_words & set(_WORD.findall(suggestion.lower())))
+        for suggestion in suggestions
+        if normalize(suggestion) not in asked_keys
+    }
+    related = sorted((suggestion for suggestion, score in overlap.items() if score), key=lambda s: -overlap[s])
+    predicted = []
+    while len(predicted) < k and (follow_ups or related):
+        for candidates in (follow_ups, related):
+            if candidates and len(predicted) < k:
+                predicted.append(candidates.pop(0))
+    return predicted
+
+
+class _Speculation:
+    def __init__(self, prompt: str):
+        self.prompt = prompt
+        self.future: Optional[Future] = None
+        self.content: Optional[str] = None
+        self.tokens = 0
+        # Estimated tokens held against the session budget until the generation ends
+        self.reserved = 0
+
+
+class SpeculativeAnswers:
+    """One session's prefetched answers, all generated for a single conversation state."""
+
+    def __init__(self, prefetcher: "Prefetcher"):
+        self.prefetcher = prefetcher
+        # Conversation state the answers belong to; see ScienceExplorerBot.conversation_state
+        self.state: Optional[Hashable] = None
+        # Tokens spent on this session's speculation so far, plus estimates for generations still running
+        self.tokens_spent = 0
+        self._entries: Dict[str, _Speculation] = {}
+        self._lock = threading.Lock()
+
+    def take(self, state: Hashable, prompt: str) -> Optional[str]:
+        """Return and consume the finished answer for prompt in this state, or None."""
+        with self._lock:
+            if state != self.state:
+                return None
+            speculation = self._entries.get(normalize(prompt))
+            if speculation is None or speculation.content is None:
+                return None
+            del self._entries[normalize(prompt)]
+        self.prefetcher.record_hit(speculation.tokens)
+        return speculation.content
+
+    def contains(self, state: Hashable, prompt: str) -> bool:
+        """Whether a finished answer for prompt in this state is waiting."""
+        with self._lock:
+            speculation = self._entries.get(normalize(prompt)) if state == self.state else None
+            return speculation is not None and speculation.content is not None
+
+    def discard(self):
+        """Cancel running speculation and drop unused answers, e.g. once the conversation moves on."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self.state = None
+        for speculation in entries:
+            if speculation.content is not None:
+                self.prefetcher.record_waste(speculation.tokens)
+            elif speculation.future is not None and speculation.future.cancel():
+                # A generation cancelled before it started never settles its reservation itself
+                self._settle(speculation, 0)
+                self.prefetcher.record_cancel()
+
+    def prefetch(self, state: Hashable, prompts: List[str], generate: Generate):
+        """Replace this session's speculation with answers to prompts, generated for state."""
+        self.prefetcher.prefetch(self, state, prompts, generate)
+
+    def _settle(self, speculation: _Speculation, tokens: int):
+        """Replace a speculation's reserved estimate with the tokens it actually used."""
+        with self._lock:
+            self.tokens_spent += tokens - speculation.reserved
+            speculation.reserved = 0
+
+
+class Prefetcher:
+    def __init__(
+        self,
+        background: BackgroundLoop,
+        scheduler: Optional[RequestScheduler] = None,
+        top_k: int = 3,
+        max_concurrent: int = 2,
+        reserve_slots: int = 4,
+        session_budget_tokens: int = 8000,
+        initial_estimate_tokens: int = 1000,
+    ):
+        self.background = background
+        self.scheduler = scheduler
+        # Prompts predicted and generated after each turn
+        self.top_k = top_k
+        # Speculative generations running at once, across all sessions
+        self.max_concurrent = max_concurrent
+        # Scheduler slots that must stay free for real requests
+        self.reserve_slots = reserve_slots
+        self.session_budget_tokens = session_budget_tokens
+        # Reserved per generation until some have finished; then their mean is used
+        self.initial_estimate_tokens = initial_estimate_tokens
+        self.scheduled = 0
+        self.completed = 0
+        self.hits = 0
+        self.cancelled = 0
+        self.failed = 0
+        # Not started because the scheduler was busy, or the session's budget was spent
+        self.skipped_load = 0
+        self.skipped_budget = 0
+        self.tokens_used = 0
+        self.tokens_wasted = 0
+        # Tokens of every finished generation, for the cost estimate
+        self.tokens_generated = 0
+        self._lock = threading.Lock()
+        # Created lazily on the loop thread
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def prefetch(self, answers: SpeculativeAnswers, state: Hashable, prompts: List[str], generate: Generate):
+        """Replace a session's speculation with answers to prompts, generated for state."""
+        answers.discard()
+        with answers._lock:
+            answers.state = state
+        for prompt in prompts[: self.top_k]:
+            estimate = self.estimated_tokens()
+            if answers.tokens_spent + estimate > self.session_budget_tokens:
+                with self._lock:
+                    self.skipped_budget += 1
+                continue
+            if self._busy():
+                with self._lock:
+                    self.skipped_load += 1
+                continue
+            speculation = _Speculation(prompt)
+            speculation.reserved = estimate
+            with answers._lock:
+                answers.tokens_spent += estimate
+                answers._entries[normalize(prompt)] = speculation
+            speculation.future = self.background.submit(self._generate(answers, state, speculation, generate))
+            with self._lock:
+                self.scheduled += 1
+
+    def estimated_tokens(self) -> int:
+        """Tokens a speculative generation is expected to use."""
+        with self._lock:
+            if not self.completed:
+                return self.initial_estimate_tokens
+            return round(self.tokens_generated / self.completed)
+
+    def stats(self) -> Dict[str, object]:
+        """Counters plus hit rate and the share of speculative tokens that were wasted."""
+        with self._lock:
+            spent = self.tokens_used + self.tokens_wasted
+            return {
+                "scheduled": self.scheduled,
+                "completed": self.completed,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.completed if self.completed else 0.0,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "skipped_load": self.skipped_load,
+                "skipped_budget": self.skipped_budget,
+                "tokens_used": self.tokens_used,
+                "tokens_wasted": self.tokens_wasted,
+                "wasted_token_ratio": self.tokens_wasted / spent if spent else 0.0,
+            }
+
+    def _busy(self) -> bool:
+        """Whether real requests are waiting or using the capacity speculation must leave free."""
+        if self.scheduler is None:
+            return False
+        stats = self.scheduler.stats()
+        return bool(stats["queue_depth"]) or stats["in_flight"] >= self.scheduler.max_concurrent - self.reserve_slots
+
+    async def _generate(self, answers: SpeculativeAnswers, state: Hashable, speculation: _Speculation, generate: Generate):
+        tokens = 0
+        try:
+            tokens = await self._run_generation(answers, state, speculation, generate)
+        finally:
+            answers._settle(speculation, tokens)
+
+    async def _run_generation(
+        self, answers: SpeculativeAnswers, state: Hashable, speculation: _Speculation, generate: Generate
+    ) -> int:
+        """Generate one speculative answer and return the tokens it used."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            if answers.state != state:
+                return 0
+            # Never queue behind, or ahead of, real requests
+            if self.scheduler is not None and not self.scheduler.try_acquire(self.reserve_slots):
+                with self._lock:
+                    self.skipped_load += 1
+                self._drop(answers, speculation)
+                return 0
+            try:
+                content, tokens = await generate(speculation.prompt)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.info("Speculative answer failed: %s", e)
+                with self._lock:
+                    self.failed += 1
+                self._drop(answers, speculation)
+                return 0
+            finally:
+                if self.scheduler is not None:
+                    self.scheduler.release()
+        with self._lock:
+            self.completed += 1
+            self.tokens_generated += tokens
+        with answers._lock:
+            current = answers.state == state and answers._entries.get(normalize(speculation.prompt)) is speculation
+            if current and content:
+                speculation.content = content
+                speculation.tokens = tokens
+        if not (current and content):
+            self.record_waste(tokens)
+        return tokens
+
+    @staticmethod
+    def _drop(answers: SpeculativeAnswers, speculation: _Speculation):
+        with answers._lock:
+            key = normalize(speculation.prompt)
+            if answers._entries.get(key) is speculation:
+                del answers._entries[key]
+
+    def record_hit(self, tokens: int):
+        with self._lock:
+            self.hits += 1
+            self.tokens_used += tokens
+
+    def record_waste(self, tokens: int):
+        with self._lock:
+            self.tokens_wasted += tokens
+
+    def record_cancel(self):
+        with self._lock:
+            self.cancelled += 1
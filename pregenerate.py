@@ -0,0 +1,128 @@
+"""
+Pre-generate answers to every suggestion prompt, so suggestion clicks are instant.
+
+Each (mode, suggestion) pair is sent with the app's model and the active
+instruction profile (SCIENCE_BOT_INSTRUCTION_PROFILE). Requests go through a RequestScheduler, which bounds how many
+are in flight, keeps to the requests-per-minute quota and retries rate limits.
+Answers are written to a versioned JSON artifact (see suggestion_answers.py)
+after every completion, so an interrupted run resumes where it stopped.
+Answers that no longer match the current instructions or model are dropped.
+
+Example:
+    python pregenerate.py --output suggestion_answers.json --concurrency 4
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import List, Tuple
+
+from agno.agent import Agent
+
+from groq_models import PooledGroq
+from model_pool import ModelClientPool
+from prompts import MODEL_ID, get_instructions, get_suggestions
+from response_cache import CacheKey, hash_instructions, make_key
+from scheduler import RequestScheduler
+from suggestion_answers import SuggestionAnswers
+
+MODES = {"kid": True, "parent": False}
+
+
+def suggestion_keys(model_id: str) -> List[CacheKey]:
+    """Cache keys of every suggestion prompt under the current instructions."""
+    keys = []
+    for mode, is_kid_mode in MODES.items():
+        instructions_hash = hash_instructions(get_instructions(is_kid_mode))
+        keys.extend(make_key(mode, prompt, model_id, instructions_hash) for prompt in get_suggestions(is_kid_mode))
+    return keys
+
+
+async def generate(key: CacheKey, pool: ModelClientPool, scheduler: RequestScheduler) -> Tuple[str, int]:
+    """Return the answer for one key and the completion tokens it used."""
+    mode, prompt, model_id, _ = key
+    agent = Agent(
+        model=PooledGroq(id=model_id, pool=pool),
+        instructions=get_instructions(MODES[mode]),
+    )
+
+    async def make_stream():
+        response = await agent.arun(prompt)
+        yield response.content or ""
+
+    # Modes take turns in the scheduler's round-robin
+    content = "".join([chunk async for chunk in scheduler.stream(mode, make_stream)])
+    metrics = agent.run_response.metrics or {}
+    completion_tokens = (metrics.get("output_tokens") or [0])[-1]
+    return content, completion_tokens
+
+
+async def pregenerate(args) -> int:
+    answers = SuggestionAnswers(args.output)
+    keys = suggestion_keys(args.model)
+    stale = answers.retain([] if args.force else keys)
+    todo = [key for key in keys if not answers.contains(key)]
+    print(f"{len(keys)} suggestions: {len(keys) - len(todo)} already generated, {len(todo)} to go, {stale} stale dropped")
+    if stale:
+        answers.save()
+
+    pool = ModelClientPool()
+    scheduler = RequestScheduler(
+        max_concurrent=args.concurrency,
+        requests_per_minute=args.requests_per_minute,
+        max_retries=args.max_retries,
+    )
+    failures = []
+    completion_tokens = 0
+    started_at = time.perf_counter()
+
+    async def job(key: CacheKey):
+        nonlocal completion_tokens
+        mode, prompt = key[0], key[1]
+        try:
+            content, tokens = await generate(key, pool, scheduler)
+        except Exception as e:
+            failures.append(key)
+            print(f"  failed  {mode:<6} {prompt}: {e}")
+            return
+        if not content:
+            failures.append(key)
+            print(f"  empty   {mode:<6} {prompt}")
+            return
+        completion_tokens += tokens
+        answers.put(key, content)
+        # Saving after every answer is what makes an interrupted run resumable
+        answers.save()
+        print(f"  done    {mode:<6} {prompt} ({tokens} tokens)")
+
+    await asyncio.gather(*(job(key) for key in todo))
+    elapsed = time.perf_counter() - started_at
+
+    generated = len(todo) - len(failures)
+    if todo:
+        print(
+            f"Generated {generated} answers in {elapsed:.1f}s: {generated / elapsed:.2f} answers/s, "
+            f"{completion_tokens / elapsed:.0f} completion tokens/s, "
+            f"{scheduler.rate_limit_retries} rate-limit retries"
+        )
+    if failures:
+        print(f"{len(failures)} failed; run again to retry them")
+    print(f"Artifact: {args.output} ({len(answers)} answers)")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate answers to the suggestion prompts.")
+    parser.add_argument("--output", default="suggestion_answers.json")
+    parser.add_argument("--model", default=MODEL_ID)
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--requests-per-minute", type=float, default=30)
+    parser.add_argument("--max-retries", type=int, default=5, help="retries per answer on rate limits")
+    parser.add_argument("--force", action="store_true", help="regenerate answers that are already up to date")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(pregenerate(args)))
+
+
+if __name__ == "__main__":
+    main()
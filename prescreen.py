@@ -0,0 +1,221 @@
+"""
+In-process pre-screen for free-text prompts.
+
+Prompts we would always redirect are answered with a canned, mode-appropriate
+reply instead of a model call:
+- requests for unsafe experiments, found by an Aho-Corasick automaton over
+  per-mode phrase lists in a single pass over the prompt,
+- empty or emoji-only input,
+- bare greetings and thanks.
+
+Matching works on a normalized copy of the prompt (lowercase words separated
+by single spaces and padded with a space), so phrases only match whole words:
+"fire" matches "make a fire" but not "fireflies".
+"""
+
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+# Actions with a hazard, not topics: "why do stars explode?" or "is dry ice
+# cold?" are fine science questions, and so are generic actions such as mixing
+# vinegar and baking soda, making a soda geyser explode or cutting a potato,
+# so single words that name a topic and hazard-free actions are left out
+KID_UNSAFE_TERMS = [
+    "make fire", "make a fire", "start a fire", "light a fire", "set fire", "set on fire", "burn something",
+    "play with matches", "light a match", "strike a match", "use a lighter", "play with a lighter", "lighter fluid",
+    "play with gasoline", "light fireworks", "make fireworks", "light a firecracker",
+    "blow something up", "make a bomb", "build a bomb", "make explosives", "make gunpowder", "use dynamite",
+    "mix bleach", "drink bleach", "drain cleaner", "make chlorine gas",
+    "electrocute myself", "electrocute someone", "give an electric shock",
+    "in the outlet", "into the outlet", "in a power outlet", "into a power outlet", "in the power outlet",
+    "into the power outlet", "in the socket", "into the socket", "in the wall socket", "into the wall socket",
+    "lick a battery", "open a battery", "use a car battery", "touch battery acid", "touch high voltage", "use a taser",
+    "touch dry ice", "play with dry ice", "touch liquid nitrogen", "play with liquid nitrogen",
+    "touch mercury", "play with mercury",
+]
+
+PARENT_UNSAFE_TERMS = [
+    "make explosives", "homemade explosive", "make a bomb", "build a bomb", "pipe bomb",
+    "make gunpowder", "make thermite", "make napalm",
+    "make chlorine gas", "mix bleach and ammonia", "make toxic gas", "make poison gas",
+    "build a tesla coil", "use a taser",
+]
+
+GREETING_WORDS = frozenset(
+    "hi hello hey hiya howdy yo sup hola greetings good morning afternoon evening day there "
+    "professor atom dr doctor morgan bot everyone".split()
+)
+# A prompt made of GREETING_WORDS only counts as a greeting if it has one of these,
+# so a bare "atom" or "evening", or "good" answering a question, still goes to the model
+GREETING_TRIGGERS = frozenset(
+    "hi hello hey hiya howdy yo sup hola greetings".split()
+    + ["good morning", "good afternoon", "good evening", "good day"]
+)
+THANKS_WORDS = frozenset("thanks thank you thx ty so much very a lot again professor atom dr morgan bot".split())
+# A prompt made of THANKS_WORDS only counts as thanks if it has one of these
+THANKS_TRIGGERS = frozenset("thanks thank thx ty".split())
+
+# Small talk that says nothing about the conversation, so it isn't remembered as a user turn
+CONTEXT_FREE_CATEGORIES = frozenset({"empty", "greeting", "thanks"})
+
+CANNED_REPLIES = {
+    "kid": {
+        "unsafe": (
+            "Whoa, that one is a job for grown-up scientists only! 🛑🧯 Fire, strong chemicals and "
+            "electricity can hurt even real scientists, so we never experiment with them on our own.\n\n"
+            "But there are SO many safe experiments that are just as cool! 🌈 Could you:\n"
+            "- 🧲 test which things a magnet can pick up?\n"
+            "- 🌱 grow beans with and without sunlight?\n"
+            "- 🧼 find out which soap makes the biggest bubbles?\n\n"
+            "Which one makes you the most curious? 🤔"
+        ),
+        "empty": (
+            "Hmm, I didn't catch a question there! 🤔🔬 Try typing something you wonder about, like "
+            "\"Why do plants need sunlight?\" 🌱 or \"How do magnets work?\" 🧲"
+        ),
+        "greeting": (
+            "Hi there, young scientist! 👋🔬 I'm Professor Atom! What are you curious about today? "
+            "Plants? 🌱 Animals? 🐾 Weather? 🌦️ Tell me, and we'll start exploring together! 🚀"
+        ),
+        "thanks": (
+            "You're so welcome, scientist! 🌟 Keep asking questions - that's what real scientists do! "
+            "What do you want to explore next? 🔍"
+        ),
+    },
+    "parent": {
+        "unsafe": (
+            "That involves materials that aren't appropriate for an elementary school science fair "
+            "project, even with supervision. 🔬 Most schools' safety rules exclude them as well.\n\n"
+            "Safer options that teach the same ideas include vinegar and baking soda reactions, "
+            "static electricity with balloons, or simple circuits with a single AA battery and an LED. "
+            "Would you like help adapting your child's idea to one of these?"
+        ),
+        "empty": (
+            "It looks like the message came through empty. What would you like help with - project "
+            "ideas, timeline planning, materials, or presentation tips? 📝"
+        ),
+        "greeting": (
+            "Hello! I'm Dr. Morgan. 🔬 I can help with project ideas, timelines, materials, documentation "
+            "and presentation. What stage is your child's science fair project at?"
+        ),
+        "thanks": (
+            "You're welcome! 📝 Let me know if you'd like help with the next step of the project."
+        ),
+    },
+}
+
+
+def normalize(text: str) -> str:
+    """Lowercase words separated by single spaces, padded with a space on both ends."""
+    return f" {_NON_WORD.sub(' ', text.lower()).strip()} "
+
+
+class AhoCorasick:
+    """Finds every occurrence of any of a set of patterns in one pass over a text."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        # Trie transitions, failure links and the patterns ending at each state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].append(index)
+        # Breadth-first, so a state's failure target is always built before it;
+        # states one character deep fail back to the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                if state:
+                    self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def search(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (end offset, pattern index) for every match, in order of end offset."""
+        state = 0
+        for offset, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                yield offset + 1, index
+
+    def first(self, text: str) -> Optional[str]:
+        """The first pattern found in text, or None."""
+        for _, index in self.search(text):
+            return self.patterns[index]
+        return None
+
+
+class PreScreen:
+    def __init__(self, unsafe_terms: Optional[Dict[str, Iterable[str]]] = None):
+        if unsafe_terms is None:
+            unsafe_terms = {"kid": KID_UNSAFE_TERMS, "parent": PARENT_UNSAFE_TERMS}
+        # One automaton per mode, compiled once; terms are padded so they only match whole words
+        self._matchers = {mode: AhoCorasick(normalize(term) for term in terms) for mode, terms in unsafe_terms.items()}
+        self.checked = 0
+        self.matched: Counter = Counter()
+        self.total_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def classify(self, mode: str, prompt: str) -> Optional[str]:
+        """Category of a prompt that gets a canned reply, or None if it should go to the model."""
+        if not any(char.isalnum() for char in prompt):
+            return "empty"
+        text = normalize(prompt)
+        words = text.split()
+        if len(words) <= 6:
+            if all(word in GREETING_WORDS for word in words) and any(
+                f" {trigger} " in text for trigger in GREETING_TRIGGERS
+            ):
+                return "greeting"
+            if all(word in THANKS_WORDS for word in words) and THANKS_TRIGGERS.intersection(words):
+                return "thanks"
+        matcher = self._matchers.get(mode)
+        if matcher is not None and matcher.first(text) is not None:
+            return "unsafe"
+        return None
+
+    def screen(self, mode: str, prompt: str, record_stats: bool = True) -> Optional[Tuple[str, str]]:
+        """Return (category, canned reply) for a prompt that shouldn't reach the model, else None."""
+        start = time.perf_counter()
+        category = self.classify(mode, prompt)
+        if record_stats:
+            with self._lock:
+                self.checked += 1
+                self.total_seconds += time.perf_counter() - start
+                if category is not None:
+                    self.matched[category] += 1
+        if category is None:
+            return None
+        return category, CANNED_REPLIES[mode][category]
+
+    def stats(self) -> Dict[str, object]:
+        """Prompts checked, short-circuit rate per category and mean screening time."""
+        with self._lock:
+            short_circuited = sum(self.matched.values())
+            return {
+                "checked": self.checked,
+                "short_circuited": short_circuited,
+                "short_circuit_rate": short_circuited / self.checked if self.checked else 0.0,
+                "by_category": dict(self.matched),
+                "mean_screen_us": 1e6 * self.total_seconds / self.checked if self.checked else 0.0,
+            }
@@ -0,0 +1,123 @@
+"""
+Process-wide response cache for the canned suggestion prompts.
+
+Entries are keyed by (mode, prompt, model id, instructions hash), evicted in
+least-recently-used order and expire after a fixed time-to-live. The cache can
+optionally be mirrored to a JSON file so it survives app restarts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+CacheKey = Tuple[str, str, str, str]
+
+
+def hash_instructions(instructions: List[str]) -> str:
+    """Return a short, stable hash of an instruction list."""
+    digest = hashlib.sha256("\n".join(instructions).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def make_key(mode: str, prompt: str, model_id: str, instructions_hash: str) -> CacheKey:
+    """Build the cache key for one prompt."""
+    return (mode, prompt, model_id, instructions_hash)
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 24 * 60 * 60, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (stored_at, content), oldest first
+        self._entries: "OrderedDict[CacheKey, Tuple[float, str]]" = OrderedDict()
+        if self.path:
+            self._load()
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        """Return the cached response for a key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry[0]):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def contains(self, key: CacheKey) -> bool:
+        """Whether a fresh entry exists, without touching recency or hit counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry[0])
+
+    def put(self, key: CacheKey, content: str) -> None:
+        """Store a response, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (time.time(), content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def clear(self) -> None:
+        """Drop every entry, including the on-disk copy."""
+        with self._lock:
+            self._entries.clear()
+            if self.path:
+                self._save()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return time.time() - stored_at > self.ttl_seconds
+
+    def _load(self) -> None:
+        """Read non-expired entries from disk; a missing or corrupt file starts empty."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return
+        for row in rows:
+            try:
+                key = tuple(row["key"])
+                stored_at = float(row["stored_at"])
+                content = row["content"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            if len(key) == 4 and not self._is_expired(stored_at):
+                self._entries[key] = (stored_at, content)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self) -> None:
+        """Write all entries to disk atomically. Caller must hold the lock."""
+        rows = [
+            {"key": list(key), "stored_at": stored_at, "content": content}
+            for key, (stored_at, content) in self._entries.items()
+        ]
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(rows, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # Persistence is best effort; the in-memory cache still works
+            pass
@@ -0,0 +1,218 @@
+"""
+Process-wide admission control for model requests.
+
+Every session's model call passes through one RequestScheduler, which
+- caps how many requests are in flight at once,
+- admits waiting sessions round-robin, so one chatty session can't starve the rest,
+- spends from a token bucket sized to the provider's requests-per-minute quota, and
+- retries rate-limited (HTTP 429) and other retryable requests with jittered
+  exponential backoff.
+
+The scheduler lives on the app's background event loop; its stats and queue
+positions can be read from any thread.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Callable, Deque, Dict, Optional
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an exception is the provider telling us to slow down."""
+    return getattr(error, "status_code", None) == 429
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether a request that failed with error should be retried after a backoff.
+
+    Besides rate limits, errors can opt in with a true `retryable` attribute.
+    """
+    return is_rate_limited(error) or getattr(error, "retryable", False)
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def try_take(self, keep: float = 0) -> bool:
+        """Take one token if available, leaving at least keep tokens in the bucket."""
+        self._refill()
+        if self.tokens >= 1 + keep:
+            self.tokens -= 1
+            return True
+        return False
+
+    def seconds_until_available(self) -> float:
+        """Time until the next token can be taken."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate_per_second
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        requests_per_minute: float = 30,
+        burst: int = 10,
+        max_retries: int = 3,
+        base_backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 20.0,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limit_retries = 0
+        self.total_wait_seconds = 0.0
+        self.last_wait_seconds = 0.0
+        # Sessions with waiting requests, in round-robin order
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        # Guards the queues for readers on other threads
+        self._lock = threading.Lock()
+
+    async def stream(
+        self, session_id: str, make_stream: Callable[[], AsyncIterator[str]], on_admit: Optional[Callable[[], None]] = None
+    ) -> AsyncIterator[str]:
+        """Run make_stream() once admitted, retrying retryable errors until it produces output."""
+        attempt = 0
+        while True:
+            await self._acquire(session_id)
+            if on_admit is not None:
+                on_admit()
+            produced = False
+            try:
+                async for chunk in make_stream():
+                    produced = True
+                    yield chunk
+                return
+            except Exception as e:
+                # Once output has reached the user a retry would duplicate it
+                if produced or not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+            finally:
+                self._release()
+            attempt += 1
+            self.rate_limit_retries += 1
+            await asyncio.sleep(self._backoff(attempt))
+
+    def try_acquire(self, reserve: int = 0) -> bool:
+        """Take a slot at once for low-priority work, or return False.
+
+        Succeeds only if no session is waiting and reserve slots and reserve
+        rate tokens stay free afterwards. Must be called on the loop; pair with
+        release().
+        """
+        with self._lock:
+            if self._queues:
+                return False
+        if self.in_flight >= self.max_concurrent - reserve or not self.bucket.try_take(keep=reserve):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        """Give back a slot taken with try_acquire()."""
+        self._release()
+
+    def position(self, session_id: str) -> Optional[int]:
+        """Zero-based place of a session in the admission order, or None if it isn't waiting."""
+        with self._lock:
+            for index, queued_session in enumerate(self._queues):
+                if queued_session == session_id:
+                    return index
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth, concurrency and wait-time counters."""
+        with self._lock:
+            queue_depth = sum(len(waiters) for waiters in self._queues.values())
+        return {
+            "queue_depth": queue_depth,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rate_limit_retries": self.rate_limit_retries,
+            "last_wait_seconds": self.last_wait_seconds,
+            "mean_wait_seconds": self.total_wait_seconds / self.admitted if self.admitted else 0.0,
+        }
+
+    async def _acquire(self, session_id: str):
+        waiter = asyncio.get_running_loop().create_future()
+        queued_at = time.monotonic()
+        with self._lock:
+            self._queues.setdefault(session_id, deque()).append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as we were cancelled; hand the slot back
+                self._release()
+            else:
+                self._discard(session_id, waiter)
+            raise
+        wait = time.monotonic() - queued_at
+        self.last_wait_seconds = wait
+        self.total_wait_seconds += wait
+        self.admitted += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _discard(self, session_id: str, waiter: asyncio.Future):
+        with self._lock:
+            waiters = self._queues.get(session_id)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._queues[session_id]
+
+    def _dispatch(self):
+        """Admit waiting requests round-robin while slots and rate tokens allow."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        while self.in_flight < self.max_concurrent:
+            with self._lock:
+                if not self._queues:
+                    return
+                session_id, waiters = next(iter(self._queues.items()))
+                if waiters[0].done():
+                    # Cancelled while queued; drop it without spending a slot
+                    waiters.popleft()
+                    if not waiters:
+                        del self._queues[session_id]
+                    continue
+                if not self.bucket.try_take():
+                    delay = self.bucket.seconds_until_available()
+                    self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                    return
+                # Admit the head session's oldest request and move the session to the back
+                waiter = waiters.popleft()
+                del self._queues[session_id]
+                if waiters:
+                    self._queues[session_id] = waiters
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff, capped at max_backoff_seconds."""
+        ceiling = min(self.max_backoff_seconds, self.base_backoff_seconds * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
@@ -0,0 +1,196 @@
+"""
+Durable per-session storage for transcripts and agent memory, backed by SQLite.
+
+Chat messages and agent turns are append-only rows keyed by session id and
+sequence number, so saving a turn inserts a few small rows instead of
+rewriting the session. One row per session holds the mode and the
+conversation window's running summary. Resuming reads only the recent tail;
+older messages are fetched a page at a time when the reader scrolls back.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    is_kid_mode INTEGER NOT NULL,
+    summary TEXT NOT NULL,
+    folded_turns INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    time_to_first_token REAL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS turns (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    user TEXT,
+    assistant TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+# (user text or None for the welcome turn, assistant text)
+Turn = Tuple[Optional[str], str]
+
+
+@dataclass
+class SessionRecord:
+    is_kid_mode: bool
+    # Running summary of the turns folded out of the verbatim window
+    summary_lines: List[str] = field(default_factory=list)
+    # Turns, from the start of the conversation, covered by the summary
+    folded_turns: int = 0
+    message_count: int = 0
+    turn_count: int = 0
+
+
+class SessionStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Shared by every session's script thread; access is serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def load(self, session_id: str) -> Optional[SessionRecord]:
+        """Return a session's mode, summary and row counts, or None if it isn't stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT is_kid_mode, summary, folded_turns FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            message_count = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            turn_count = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM turns WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+        return SessionRecord(
+            is_kid_mode=bool(row[0]),
+            summary_lines=json.loads(row[1]),
+            folded_turns=row[2],
+            message_count=message_count,
+            turn_count=turn_count,
+        )
+
+    def append(
+        self,
+        session_id: str,
+        record: SessionRecord,
+        messages: List[Dict[str, Any]],
+        turns: List[Turn],
+    ) -> bool:
+        """Append new messages and turns after the counts in record, and update the session row.
+
+        Everything is written in one transaction; record's counts are advanced
+        once it commits. Returns False if the write failed, which leaves the
+        session to be saved again on the next call.
+        """
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO messages (session_id, seq, role, content, time_to_first_token)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (session_id, record.message_count + i, m["role"], m["content"], m.get("time_to_first_token"))
+                        for i, m in enumerate(messages)
+                    ],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO turns (session_id, seq, user, assistant) VALUES (?, ?, ?, ?)",
+                    [(session_id, record.turn_count + i, user or None, assistant) for i, (user, assistant) in enumerate(turns)],
+                )
+                self._conn.execute(
+                    "INSERT INTO sessions (session_id, is_kid_mode, summary, folded_turns, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (session_id) DO UPDATE SET is_kid_mode = excluded.is_kid_mode,"
+                    " summary = excluded.summary, folded_turns = excluded.folded_turns, updated_at = excluded.updated_at",
+                    (
+                        session_id,
+                        int(record.is_kid_mode),
+                        json.dumps(record.summary_lines, ensure_ascii=False),
+                        record.folded_turns,
+                        time.time(),
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                # Persistence is best effort; the live session still works
+                logger.warning("Saving session %s failed: %s", session_id, e)
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                return False
+        record.message_count += len(messages)
+        record.turn_count += len(turns)
+        return True
+
+    def messages(self, session_id: str, start: int, end: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Messages with sequence numbers in [start, end), oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content, time_to_first_token FROM messages"
+                " WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (session_id, start, end if end is not None else 2 ** 62),
+            ).fetchall()
+        messages = []
+        for role, content, time_to_first_token in rows:
+            message = {"role": role, "content": content}
+            if role == "assistant":
+                message["time_to_first_token"] = time_to_first_token
+            messages.append(message)
+        return messages
+
+    def turns(self, session_id: str, start: int) -> List[Turn]:
+        """Agent turns from sequence number start onward, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT user, assistant FROM turns WHERE session_id = ? AND seq >= ? ORDER BY seq",
+                (session_id, start),
+            ).fetchall()
+
+    def delete(self, session_id: str) -> bool:
+        """Forget a session entirely, e.g. when it starts over.
+
+        Returns False if the delete failed. Rows left behind are overwritten as
+        the session is saved again, or pruned once it goes idle.
+        """
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN")
+                for table in ("messages", "turns", "sessions"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                # Best effort, like saving; starting over must not break the page
+                logger.warning("Deleting session %s failed: %s", session_id, e)
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                return False
+        return True
+
+    def prune(self, max_idle_seconds: float) -> int:
+        """Delete sessions idle for longer than max_idle_seconds and return how many went."""
+        cutoff = time.time() - max_idle_seconds
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute("SELECT session_id FROM sessions WHERE updated_at < ?", (cutoff,))]
+        for session_id in ids:
+            self.delete(session_id)
+        return len(ids)
@@ -0,0 +1,196 @@
+"""
+Near-duplicate question cache for free-text prompts.
+
+Questions are normalized and turned into weighted TF-IDF vectors. Content
+words carry the meaning and dominate. Generic verbs such as "need" or "help"
+count for little, so "why do plants need sun" and "how does sunlight help
+plants" line up while "why do plants need water" does not. Character trigrams
+of content words add a little tolerance for typos. Word variants are folded
+together first: light suffix stripping plus a small table of synonyms
+("sunlight" -> "sun"). A new question whose cosine similarity to an indexed
+one clears the threshold is served that question's answer. Each
+namespace (mode + instructions) keeps a bounded index with LRU eviction, and
+an inverted index limits scoring to questions that share a feature.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are be can could do does did for from how i in is it me my of on or "
+    "please should so that the this to was what when where which who why will with "
+    "would you your".split()
+)
+
+
+# Words that mean the same thing in a kid's science question, and irregular forms
+SYNONYMS = {
+    "sunlight": "sun", "sunshine": "sun", "sunny": "sun", "sunlit": "sun",
+    "rainfall": "rain", "rainy": "rain", "rainwater": "water", "h2o": "water",
+    "magnetic": "magnet", "magnetism": "magnet",
+    "made": "make", "used": "use", "grew": "grow", "grown": "grow", "froze": "freez", "frozen": "freez",
+    "leaves": "leaf", "children": "kid", "child": "kid",
+}
+
+# Verbs and fillers that say little about what a question is about
+GENERIC_WORDS = frozenset(
+    "need help make work happen get use know tell explain cause let want go keep "
+    "thing stuff really kind way much many some".split()
+)
+
+# Relative weight of each feature kind in the vector
+FEATURE_WEIGHTS = {"w:": 1.0, "g:": 0.3, "c:": 0.25}
+
+
+def _stem(word: str) -> str:
+    """Very light suffix stripping so plurals and tenses line up."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    # "es" is only a suffix of its own after a hissing sound: boxes, glasses, beaches
+    if len(word) > 4 and word.endswith(("ses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    for suffix in ("ing", "ed", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix) and not word.endswith("ss"):
+            return word[: -len(suffix)]
+    return word
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercase, drop punctuation, emoji and stopwords, and fold each remaining word to a canonical stem."""
+    words = _WORD_PATTERN.findall(text.lower())
+    normalized = []
+    for word in words:
+        if word in STOPWORDS:
+            continue
+        word = SYNONYMS.get(word, word)
+        stem = _stem(word)
+        normalized.append(SYNONYMS.get(stem, stem))
+    return normalized
+
+
+def features(text: str) -> Counter:
+    """Content words, generic words, and character trigrams of content words."""
+    counts: Counter = Counter()
+    for word in normalize(text):
+        if word in GENERIC_WORDS:
+            counts[f"g:{word}"] += 1
+            continue
+        counts[f"w:{word}"] += 1
+        padded = f"#{word}#"
+        counts.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return counts
+
+
+class _Index:
+    """TF-IDF index of questions for one namespace."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._next_id = 0
+        # entry id -> (term counts, answer), oldest first
+        self.entries: "OrderedDict[int, Tuple[Counter, str]]" = OrderedDict()
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self.entries)) / (1 + len(self.postings.get(term, ())))) + 1.0
+
+    def _vector(self, counts: Counter) -> Dict[str, float]:
+        vector = {
+            term: FEATURE_WEIGHTS[term[:2]] * (1 + math.log(count)) * self._idf(term) for term, count in counts.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {term: weight / norm for term, weight in vector.items()}
+
+    def best_match(self, counts: Counter) -> Tuple[Optional[int], float]:
+        candidates: Set[int] = set()
+        for term in counts:
+            candidates |= self.postings.get(term, set())
+        if not candidates:
+            return None, 0.0
+        query = self._vector(counts)
+        best_id, best_score = None, 0.0
+        for entry_id in candidates:
+            vector = self._vector(self.entries[entry_id][0])
+            score = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            if score > best_score:
+                best_id, best_score = entry_id, score
+        return best_id, best_score
+
+    def add(self, counts: Counter, answer: str):
+        entry_id = self._next_id
+        self._next_id += 1
+        self.entries[entry_id] = (counts, answer)
+        for term in counts:
+            self.postings[term].add(entry_id)
+        while len(self.entries) > self.max_entries:
+            old_id, (old_counts, _) = self.entries.popitem(last=False)
+            for term in old_counts:
+                ids = self.postings[term]
+                ids.discard(old_id)
+                if not ids:
+                    del self.postings[term]
+
+    def touch(self, entry_id: int):
+        self.entries.move_to_end(entry_id)
+
+
+class SimilarityCache:
+    def __init__(self, threshold: float = 0.85, max_entries_per_namespace: int = 500):
+        # Minimum cosine similarity for serving a cached answer
+        self.threshold = threshold
+        self.max_entries_per_namespace = max_entries_per_namespace
+        self.hits = 0
+        self.misses = 0
+        self.total_lookup_seconds = 0.0
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, _Index] = {}
+
+    def lookup(self, namespace: str, question: str, record_stats: bool = True) -> Optional[str]:
+        """Return the answer to the most similar indexed question, if it is similar enough."""
+        start = time.perf_counter()
+        counts = features(question)
+        answer = None
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is not None and counts:
+                entry_id, score = index.best_match(counts)
+                if entry_id is not None and score >= self.threshold:
+                    answer = index.entries[entry_id][1]
+                    if record_stats:
+                        index.touch(entry_id)
+            if record_stats:
+                if answer is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                self.total_lookup_seconds += time.perf_counter() - start
+        return answer
+
+    def add(self, namespace: str, question: str, answer: str):
+        """Index a question and its answer."""
+        counts = features(question)
+        if not counts:
+            return
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                index = self._indexes[namespace] = _Index(self.max_entries_per_namespace)
+            index.add(counts, answer)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters, mean lookup latency and index size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "mean_lookup_ms": 1000 * self.total_lookup_seconds / lookups if lookups else 0.0,
+                "size": sum(len(index.entries) for index in self._indexes.values()),
+            }
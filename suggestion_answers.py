@@ -0,0 +1,108 @@
+"""
+Pre-generated answers to the suggestion prompts.
+
+The artifact is a JSON file written by pregenerate.py. Every entry carries the
+full response-cache key (mode, prompt, model id, instructions hash), so an
+answer generated for different instructions or another model simply never
+matches and the app falls back to a live call. The file is read lazily on the
+first lookup.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from response_cache import CacheKey
+
+# Bumped whenever the file layout changes; files with another version are ignored
+ARTIFACT_VERSION = 1
+
+
+class SuggestionAnswers:
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[CacheKey, str]] = None
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        """Return the pre-generated answer for a key, or None."""
+        with self._lock:
+            content = self._loaded().get(key)
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return content
+
+    def contains(self, key: CacheKey) -> bool:
+        """Whether an answer exists, without touching hit counters."""
+        with self._lock:
+            return key in self._loaded()
+
+    def put(self, key: CacheKey, content: str):
+        """Add or replace one answer in memory; call save() to write the file."""
+        with self._lock:
+            self._loaded()[key] = content
+
+    def retain(self, keys) -> int:
+        """Drop every answer whose key isn't in keys and return how many went."""
+        keep = set(keys)
+        with self._lock:
+            entries = self._loaded()
+            stale = [key for key in entries if key not in keep]
+            for key in stale:
+                del entries[key]
+            return len(stale)
+
+    def save(self):
+        """Write all answers to the artifact file atomically."""
+        with self._lock:
+            rows = [
+                {"mode": mode, "prompt": prompt, "model_id": model_id, "instructions_hash": instructions_hash, "content": content}
+                for (mode, prompt, model_id, instructions_hash), content in self._loaded().items()
+            ]
+        artifact = {"version": ARTIFACT_VERSION, "generated_at": time.time(), "entries": rows}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and the number of answers loaded (0 until first use)."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries or {})}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._loaded())
+
+    def _loaded(self) -> Dict[CacheKey, str]:
+        """Read the artifact on first use; a missing, corrupt or outdated file gives no answers.
+
+        Caller must hold the lock.
+        """
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        if not self.path:
+            return self._entries
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                artifact = json.load(f)
+        except (OSError, ValueError):
+            return self._entries
+        if not isinstance(artifact, dict) or artifact.get("version") != ARTIFACT_VERSION:
+            return self._entries
+        for row in artifact.get("entries", []):
+            try:
+                key = (row["mode"], row["prompt"], row["model_id"], row["instructions_hash"])
+                content = row["content"]
+            except (KeyError, TypeError):
+                continue
+            if isinstance(content, str) and content:
+                self._entries[key] = content
+        return self._entries
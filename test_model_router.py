@@ -0,0 +1,206 @@
+"""Tests for ModelRouter against local stub backends."""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from model_router import ModelRouter, NoBackendAvailable
+from prompts import MODEL_ID
+from scheduler import RequestScheduler, is_retryable
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class StubBackends:
+    """Streams that answer after a delay or fail, scripted per backend.
+
+    Each call to a backend takes the next (delay, error) step of its script;
+    the last step repeats.
+    """
+
+    def __init__(self, scripts: Dict[str, List[Tuple[float, Optional[Exception]]]]):
+        self.scripts = scripts
+        self.calls: Dict[str, int] = {name: 0 for name in scripts}
+        self.closed: Dict[str, int] = {name: 0 for name in scripts}
+
+    def open_stream(self, name: str):
+        steps = self.scripts[name]
+        delay, error = steps[min(self.calls[name], len(steps) - 1)]
+        self.calls[name] += 1
+        return self._stream(name, delay, error)
+
+    async def _stream(self, name: str, delay: float, error: Optional[Exception]):
+        try:
+            await asyncio.sleep(delay)
+            if error is not None:
+                raise error
+            yield f"{name}:1"
+            yield f"{name}:2"
+        finally:
+            self.closed[name] += 1
+
+
+def collect(router: ModelRouter, backends: StubBackends) -> List[str]:
+    async def run():
+        return [chunk async for chunk in router.stream(backends.open_stream)]
+
+    return asyncio.run(run())
+
+
+def make_router(backends: List[str], **kwargs) -> ModelRouter:
+    kwargs.setdefault("initial_hedge_seconds", 0.05)
+    kwargs.setdefault("max_hedge_ratio", 1.0)
+    return ModelRouter(backends, **kwargs)
+
+
+def test_hedge_wins_and_loser_is_cancelled():
+    backends = StubBackends({"slow": [(1.0, None)], "fast": [(0.0, None)]})
+    router = make_router(["slow", "fast"])
+
+    assert collect(router, backends) == ["fast:1", "fast:2"]
+    stats = router.stats()
+    assert stats["hedges"] == 1
+    assert stats["backends"]["fast"]["wins"] == 1
+    assert stats["backends"]["slow"]["slow"] == 1
+    assert backends.closed["slow"] == 1
+
+
+def test_primary_wins_when_it_answers_before_the_hedge():
+    backends = StubBackends({"primary": [(0.1, None)], "hedge": [(0.5, None)]})
+    router = make_router(["primary", "hedge"])
+
+    assert collect(router, backends) == ["primary:1", "primary:2"]
+    assert router.stats()["backends"]["hedge"]["slow"] == 1
+
+
+def test_default_single_model_hedges_within_the_rate_bucket():
+    # As get_model_router sets it up with SCIENCE_BOT_MODELS unset
+    scheduler = RequestScheduler(burst=10)
+    backends = StubBackends({MODEL_ID: [(1.0, None), (0.0, None)]})
+    router = make_router([MODEL_ID], admit_hedge=scheduler.bucket.try_take)
+
+    assert collect(router, backends) == [f"{MODEL_ID}:1", f"{MODEL_ID}:2"]
+    assert router.stats()["hedges"] == 1
+    assert backends.calls[MODEL_ID] == 2
+    assert backends.closed[MODEL_ID] == 2
+    assert scheduler.bucket.tokens < 10
+
+
+def test_hedge_skipped_when_rate_bucket_is_empty():
+    scheduler = RequestScheduler(requests_per_minute=0.001, burst=1)
+    assert scheduler.bucket.try_take()
+    backends = StubBackends({MODEL_ID: [(0.2, None), (0.0, None)]})
+    router = make_router([MODEL_ID], admit_hedge=scheduler.bucket.try_take)
+
+    assert collect(router, backends) == [f"{MODEL_ID}:1", f"{MODEL_ID}:2"]
+    assert router.stats()["hedges"] == 0
+    assert backends.calls[MODEL_ID] == 1
+
+
+def test_abandoned_request_adds_no_latency_sample():
+    backends = StubBackends({"only": [(1.0, None)]})
+    router = make_router(["only"], initial_hedge_seconds=5.0)
+
+    async def abandon():
+        stream = router.stream(backends.open_stream)
+        task = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(abandon())
+    assert router.stats()["backends"]["only"]["p50_first_chunk_ms"] is None
+    assert backends.closed["only"] == 1
+
+
+def test_hedge_needs_admission():
+    backends = StubBackends({"slow": [(0.2, None)], "fast": [(0.0, None)]})
+    router = make_router(["slow", "fast"], admit_hedge=lambda: False)
+
+    assert collect(router, backends) == ["slow:1", "slow:2"]
+    assert backends.calls["fast"] == 0
+
+
+def test_failover_to_next_backend():
+    backends = StubBackends({"bad": [(0.0, RuntimeError("boom"))], "good": [(0.0, None)]})
+    router = make_router(["bad", "good"])
+
+    assert collect(router, backends) == ["good:1", "good:2"]
+    stats = router.stats()
+    assert stats["failovers"] == 1
+    assert stats["backends"]["bad"]["failures"] == 1
+
+
+def test_last_error_raised_when_every_backend_fails():
+    backends = StubBackends({"a": [(0.0, RuntimeError("a"))], "b": [(0.0, RuntimeError("b"))]})
+    router = make_router(["a", "b"])
+
+    with pytest.raises(RuntimeError, match="b"):
+        collect(router, backends)
+
+
+def test_breaker_opens_half_opens_and_closes():
+    backends = StubBackends({"flaky": [(0.0, RuntimeError("down"))] * 2 + [(0.0, None)], "steady": [(0.0, None)]})
+    router = make_router(["flaky", "steady"], failure_threshold=2, reset_seconds=0.1)
+
+    for _ in range(2):
+        assert collect(router, backends) == ["steady:1", "steady:2"]
+    assert router.stats()["backends"]["flaky"]["circuit"] == "open"
+
+    # Skipped while open
+    collect(router, backends)
+    assert backends.calls["flaky"] == 2
+
+    asyncio.run(asyncio.sleep(0.1))
+    assert router.stats()["backends"]["flaky"]["circuit"] == "half-open"
+    # The trial request succeeds and closes the circuit
+    assert collect(router, backends) == ["flaky:1", "flaky:2"]
+    assert router.stats()["backends"]["flaky"]["circuit"] == "closed"
+
+
+def test_failed_trial_reopens_the_circuit():
+    backends = StubBackends({"flaky": [(0.0, RuntimeError("down"))], "steady": [(0.0, None)]})
+    router = make_router(["flaky", "steady"], failure_threshold=1, reset_seconds=0.1)
+
+    collect(router, backends)
+    asyncio.run(asyncio.sleep(0.1))
+    collect(router, backends)
+    assert backends.calls["flaky"] == 2
+    assert router.stats()["backends"]["flaky"]["circuit"] == "open"
+
+
+def test_last_working_backend_stays_closed():
+    backends = StubBackends({"only": [(0.0, RuntimeError("down"))]})
+    router = make_router(["only"], failure_threshold=2)
+
+    for _ in range(5):
+        with pytest.raises(RuntimeError):
+            collect(router, backends)
+    stats = router.stats()["backends"]["only"]
+    assert stats["failures"] == 5
+    assert stats["circuit"] == "closed"
+
+
+def test_rate_limits_are_retried_without_opening_the_circuit():
+    backends = StubBackends({"only": [(0.0, RateLimited())] * 3 + [(0.0, None)]})
+    router = make_router(["only"], failure_threshold=3)
+    scheduler = RequestScheduler(base_backoff_seconds=0.01, max_backoff_seconds=0.01)
+
+    async def run():
+        make_stream = lambda: router.stream(backends.open_stream)  # noqa: E731
+        return [chunk async for chunk in scheduler.stream("session", make_stream)]
+
+    assert asyncio.run(run()) == ["only:1", "only:2"]
+    stats = router.stats()["backends"]["only"]
+    assert stats["rate_limited"] == 3
+    assert stats["failures"] == 0
+    assert stats["circuit"] == "closed"
+    assert scheduler.rate_limit_retries == 3
+
+
+def test_no_backend_available_is_retryable():
+    assert is_retryable(NoBackendAvailable("all open"))
+    assert not is_retryable(RuntimeError("boom"))
@@ -0,0 +1,48 @@
+"""Tests for speculative prefetch budgeting."""
+
+import asyncio
+import concurrent.futures
+
+from async_runner import BackgroundLoop
+from prefetch import Prefetcher, SpeculativeAnswers
+
+
+def wait_for(answers: SpeculativeAnswers):
+    futures = [speculation.future for speculation in answers._entries.values() if speculation.future is not None]
+    concurrent.futures.wait(futures, timeout=5)
+
+
+def test_budget_is_reserved_when_scheduled():
+    prefetcher = Prefetcher(BackgroundLoop(), top_k=3, session_budget_tokens=2500, initial_estimate_tokens=1000)
+    answers = SpeculativeAnswers(prefetcher)
+
+    async def generate(prompt: str):
+        return f"answer to {prompt}", 400
+
+    answers.prefetch("state", ["a", "b", "c"], generate)
+    # Two estimates fit the budget; the third would overshoot it
+    assert prefetcher.stats()["scheduled"] == 2
+    assert prefetcher.stats()["skipped_budget"] == 1
+    assert answers.tokens_spent == 2000
+
+    wait_for(answers)
+    assert answers.tokens_spent == 800
+    assert prefetcher.estimated_tokens() == 400
+    assert answers.take("state", "a") == "answer to a"
+
+
+def test_cancelled_generation_releases_its_reservation():
+    prefetcher = Prefetcher(BackgroundLoop(), top_k=2, initial_estimate_tokens=1000)
+    answers = SpeculativeAnswers(prefetcher)
+
+    async def generate(prompt: str):
+        await asyncio.sleep(10)
+        return prompt, 400
+
+    answers.prefetch("state", ["a", "b"], generate)
+    assert answers.tokens_spent == 2000
+    futures = [speculation.future for speculation in answers._entries.values()]
+    answers.discard()
+    concurrent.futures.wait(futures, timeout=5)
+    assert answers.tokens_spent == 0
+    assert prefetcher.stats()["cancelled"] == 2
@@ -0,0 +1,60 @@
+"""Tests for the free-text pre-screen."""
+
+import pytest
+
+from prescreen import PreScreen
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "Which is lighter, a feather or a rock?",
+        "Why do stars explode?",
+        "How do I make a baking soda volcano explosion?",
+        "Why is Mercury so hot?",
+        "is dry ice cold",
+        "how do I blow up a balloon",
+        "why do fireworks have colors",
+        "how do I make a bath bomb",
+        "what happens when mixing chemicals like baking soda and vinegar",
+        "how do I make it explode higher with mentos and soda",
+        "can I use a knife to cut the potato for my potato battery",
+        "atom",
+        "evening",
+        "good",
+        "good!",
+    ],
+)
+def test_science_questions_reach_the_model(prompt):
+    assert PreScreen().classify("kid", prompt) is None
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "who invented dynamite",
+        "how does a taser work",
+        "which houseplants remove toxic gas from the air",
+        "how does a tesla coil work",
+    ],
+)
+def test_parent_topic_questions_reach_the_model(prompt):
+    assert PreScreen().classify("parent", prompt) is None
+
+
+@pytest.mark.parametrize(
+    "mode, prompt, category",
+    [
+        ("kid", "can I make a fire in my room", "unsafe"),
+        ("kid", "Can I touch mercury from a thermometer?", "unsafe"),
+        ("kid", "can I put a fork in the outlet", "unsafe"),
+        ("parent", "how do we mix bleach and ammonia safely", "unsafe"),
+        ("kid", "hi professor atom", "greeting"),
+        ("kid", "Good morning!", "greeting"),
+        ("kid", "good afternoon professor atom", "greeting"),
+        ("parent", "thank you so much", "thanks"),
+        ("kid", "🤔🤔", "empty"),
+    ],
+)
+def test_canned_categories(mode, prompt, category):
+    assert PreScreen().classify(mode, prompt) == category
@@ -0,0 +1,70 @@
+"""Tests for the near-duplicate question cache."""
+
+import pytest
+
+from similarity_cache import SimilarityCache, normalize
+
+INDEXED = {
+    "why do plants need sun": "sun answer",
+    "why do plants need water": "water answer",
+    "how do magnets work": "magnet answer",
+    "what makes a rainbow": "rainbow answer",
+    "why does ice melt": "melting answer",
+    "how do bubbles form": "bubble answer",
+}
+
+
+@pytest.fixture
+def cache() -> SimilarityCache:
+    cache = SimilarityCache()
+    for question, answer in INDEXED.items():
+        cache.add("kid", question, answer)
+    return cache
+
+
+@pytest.mark.parametrize(
+    "question, answer",
+    [
+        ("do plants need sunlight?", "sun answer"),
+        ("how does sunlight help plants", "sun answer"),
+        ("Why do plants need sunshine?", "sun answer"),
+        ("how does a magnet work", "magnet answer"),
+        ("how are rainbows made", "rainbow answer"),
+        ("how does a bubble form?", "bubble answer"),
+    ],
+)
+def test_paraphrases_hit(cache, question, answer):
+    assert cache.lookup("kid", question) == answer
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "why do animals need sun",
+        "how does water help animals",
+        "do plants need soil",
+        "how do magnets stick to the fridge",
+        "why does ice float",
+        "how do plants grow",
+    ],
+)
+def test_near_misses_are_rejected(cache, question):
+    assert cache.lookup("kid", question) is None
+
+
+def test_namespaces_are_separate(cache):
+    assert cache.lookup("parent", "why do plants need sun") is None
+
+
+@pytest.mark.parametrize(
+    "word, stem",
+    [("plants", "plant"), ("bubbles", "bubble"), ("glasses", "glass"), ("batteries", "battery"), ("sunlight", "sun")],
+)
+def test_normalize_folds_word_variants(word, stem):
+    assert normalize(word) == [stem]
+
+
+def test_same_question_about_something_else_is_rejected():
+    cache = SimilarityCache()
+    cache.add("kid", "why do plants need sun", "sun answer")
+    assert cache.lookup("kid", "why do plants need water") is None